@@ -1031,19 +1031,37 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import os
-import psycopg2
-from psycopg2 import pool
-from psycopg2.extras import RealDictCursor
+import hashlib
+import json
+import math
+import multiprocessing
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from psycopg2.extras import RealDictCursor, execute_values, Json
 from contextlib import contextmanager
 from dotenv import load_dotenv
 import bcrypt
 import jwt
 from functools import wraps
+from collections import Counter, defaultdict
+from db_pool import ConnectionPool
+from market_data import MarketDataStore, process_memory
+from rsi import wilder_rsi, RsiState
+from signals import market_signals, turnover_ranks, carry_forward, rsi_state
+from caching import TTLCache, LRUCache
+from json_provider import JSONProvider, json_default
+from charts import crossover_masks, crossover_signals, chart_payload, lttb_indices
+from backtest import DEFAULT_SETTINGS, MarketArrays, run_backtest
+from sweep import SWEEP_KEYS, settings_grid, run_sweep
 
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
+# Encodes Decimal, dates and NumPy values itself (orjson when installed)
+app.json = JSONProvider(app)
 
 app.config['DEBUG'] = True
 app.config['ENV'] = 'development'
@@ -1051,6 +1069,21 @@ app.config['ENV'] = 'development'
 DATA_FILE = os.path.join(os.path.dirname(__file__), 'data', 'data_sample.csv')
 JWT_SECRET = os.getenv('JWT_SECRET_KEY', 'your-super-secret-key-change-this-in-production')
 
+# Shared, parsed-once copy of DATA_FILE (reloaded when the file changes);
+# each load is seeded with the saved RSI states (seed_rsi_states, defined below)
+market_store = MarketDataStore(DATA_FILE, on_load=lambda snapshot: seed_rsi_states(snapshot))
+
+# Per-user and global settings, cached per worker. Admin updates invalidate it;
+# the TTL bounds staleness for changes made through other workers.
+settings_cache = TTLCache(int(os.getenv('SETTINGS_CACHE_TTL', '30')))
+
+# Serialized /api/scanner responses, keyed on everything the scan reads
+# (see scanner_cache_key) so a changed input is a miss rather than stale data.
+scanner_cache = LRUCache(
+    max_entries=int(os.getenv('SCANNER_CACHE_MAX_ENTRIES', '256')),
+    max_bytes=int(os.getenv('SCANNER_CACHE_MAX_MB', '64')) * 1024 * 1024
+)
+
 DB_CONFIG = {
     'host': os.getenv('DB_HOST', 'localhost'),
     'port': os.getenv('DB_PORT', '5432'),
@@ -1059,22 +1092,36 @@ DB_CONFIG = {
     'password': os.getenv('DB_PASSWORD', 'your_password_here')
 }
 
+DB_POOL_CONFIG = {
+    'minconn': int(os.getenv('DB_POOL_MIN', '4')),
+    'maxconn': int(os.getenv('DB_POOL_MAX', '20')),
+    'acquire_timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+    'health_check_after': float(os.getenv('DB_POOL_HEALTH_CHECK_AFTER', '30'))
+}
+
 connection_pool = None
+_pool_lock = threading.Lock()
 
 def init_connection_pool():
     global connection_pool
-    try:
-        connection_pool = psycopg2.pool.SimpleConnectionPool(1, 20, **DB_CONFIG)
-        if connection_pool:
+    with _pool_lock:
+        if connection_pool is not None:
+            return True
+        try:
+            connection_pool = ConnectionPool(**DB_POOL_CONFIG, **DB_CONFIG)
             print("✅ PostgreSQL connection pool created successfully")
             return True
-    except Exception as e:
-        print(f"❌ Error creating connection pool: {e}")
-        return False
+        except Exception as e:
+            print(f"❌ Error creating connection pool: {e}")
+            return False
 
 @contextmanager
 def get_db():
+    # The pool is created at import time; retry here if the database was down then
+    if connection_pool is None and not init_connection_pool():
+        raise RuntimeError('Database connection pool is not available')
     conn = None
+    cursor = None
     try:
         conn = connection_pool.getconn()
         conn.autocommit = False
@@ -1087,9 +1134,26 @@ def get_db():
         raise e
     finally:
         if conn:
-            cursor.close()
+            if cursor is not None:
+                cursor.close()
             connection_pool.putconn(conn)
 
+@contextmanager
+def use_db(cursor=None):
+    """Reuse the caller's cursor (same connection and transaction) or open a new one
+
+    Lets multi-step operations such as a trade run as one unit of work while
+    the helpers below stay usable on their own.
+    """
+    if cursor is not None:
+        yield cursor
+    else:
+        with get_db() as new_cursor:
+            yield new_cursor
+
+# Create the pool when the app is created (wsgi.py imports this module)
+init_connection_pool()
+
 # ============================================================================
 # AUTHENTICATION HELPERS
 # ============================================================================
@@ -1158,113 +1222,55 @@ def clean_numeric_value(value):
         return float(value.replace(',', ''))
     return float(value)
 
+def get_market_data():
+    """Get the shared, cleaned market data frame (None if DATA_FILE is missing)
+
+    Dates are already datetime64 and OHLC/Vol/Turnover already float64.
+    The frame is shared between requests - copy before modifying it.
+    """
+    snapshot = market_store.get()
+    return snapshot.frame if snapshot is not None else None
+
 def calculate_rsi(prices, period=14):
-    if len(prices) < period + 1:
-        return pd.Series([np.nan] * len(prices), index=prices.index)
-    delta = prices.diff()
-    gains = delta.where(delta > 0, 0)
-    losses = -delta.where(delta < 0, 0)
-    avg_gain = gains.rolling(window=period, min_periods=period).mean()
-    avg_loss = losses.rolling(window=period, min_periods=period).mean()
-    avg_gain = avg_gain.copy()
-    avg_loss = avg_loss.copy()
-    if len(gains) > period:
-        for i in range(period, len(gains)):
-            if pd.notna(avg_gain.iloc[i-1]) and pd.notna(avg_loss.iloc[i-1]):
-                avg_gain.iloc[i] = (avg_gain.iloc[i-1] * (period - 1) + gains.iloc[i]) / period
-                avg_loss.iloc[i] = (avg_loss.iloc[i-1] * (period - 1) + losses.iloc[i]) / period
-    rs = avg_gain / avg_loss.replace(0, np.nan)
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-def get_top_turnover_symbols(df, date, top_n=15):
-    """Get top N symbols by turnover on a specific date"""
-    date_data = df[df['Date'] == date].copy()
-    if 'Turnover' in date_data.columns:
-        date_data['calculated_turnover'] = date_data['Turnover'].apply(clean_numeric_value)
-    else:
-        date_data['calculated_turnover'] = (
-            date_data['Volume'].apply(clean_numeric_value) * 
-            date_data['Close'].apply(clean_numeric_value)
-        )
-    top_symbols = date_data.nlargest(top_n, 'calculated_turnover')
-    return top_symbols[['Symbol', 'calculated_turnover']].reset_index(drop=True)
+    """Wilder RSI of a price series (vectorized, see rsi.py)"""
+    return wilder_rsi(prices, period)
 
-def get_turnover_rank(symbol, date_str, df=None):
-    """Get the turnover rank of a symbol on a specific date (1 = highest turnover)"""
-    if df is None:
-        df = pd.read_csv(DATA_FILE)
-        df['Symbol'] = df['Symbol'].astype(str).str.strip()
-        df = df[df['Symbol'].notna() & (df['Symbol'] != 'nan') & (df['Symbol'] != '')]
-        df['Date'] = pd.to_datetime(df['Date'], format='%d/%m/%Y', errors='coerce')
-        df = df.dropna(subset=['Date'])
-    
-    current_date = pd.to_datetime(date_str, format='%Y-%m-%d')
-    date_data = df[df['Date'] == current_date].copy()
-    
-    if date_data.empty:
+def get_turnover_ranks():
+    """Get the precomputed (date x symbol) turnover rank table for the current data"""
+    snapshot = market_store.get()
+    if snapshot is None:
         return None
-    
-    if 'Turnover' in date_data.columns:
-        date_data['calculated_turnover'] = date_data['Turnover'].apply(clean_numeric_value)
-    else:
-        date_data['calculated_turnover'] = (
-            date_data['Volume'].apply(clean_numeric_value) * 
-            date_data['Close'].apply(clean_numeric_value)
-        )
-    
-    date_data = date_data.sort_values('calculated_turnover', ascending=False).reset_index(drop=True)
-    
-    symbol_row = date_data[date_data['Symbol'] == symbol]
-    if symbol_row.empty:
-        return None
-    
-    rank = symbol_row.index[0] + 1  # +1 because index is 0-based
-    return rank
+    return turnover_ranks(snapshot)
 
-def check_turnover_eligibility(symbol, date_str):
+def get_turnover_rank(symbol, date_str):
+    """Get the turnover rank of a symbol on a specific date (1 = highest turnover)"""
+    ranks = get_turnover_ranks()
+    return ranks.rank(symbol, date_str) if ranks is not None else None
+
+def check_turnover_eligibility(symbol, date_str, settings=None):
     """Check if symbol is in top N turnover for required consecutive days"""
     try:
-        # Get settings
-        settings = get_settings()
+        # Get settings (callers scanning many symbols pass them in)
+        settings = settings or get_settings()
         top_n = settings.get('top_turnover_count', 15)
         days_required = settings.get('top_turnover_days', 2)
         
-        df = pd.read_csv(DATA_FILE)
-        df['Symbol'] = df['Symbol'].astype(str).str.strip()
-        df = df[df['Symbol'].notna() & (df['Symbol'] != 'nan') & (df['Symbol'] != '')]
-        df['Date'] = pd.to_datetime(df['Date'], format='%d/%m/%Y', errors='coerce')
-        df = df.dropna(subset=['Date'])
-        df = df.sort_values('Date')
-        
-        current_date = pd.to_datetime(date_str, format='%Y-%m-%d')
-        unique_dates = sorted(df['Date'].unique())
-        
-        current_date_idx = None
-        for idx, d in enumerate(unique_dates):
-            if d == current_date:
-                current_date_idx = idx
-                break
-        
-        if current_date_idx is None or current_date_idx < (days_required - 1):
+        ranks = get_turnover_ranks()
+        if ranks is None:
             return False
         
-        # Check if symbol is in top N for the required consecutive days
-        for i in range(days_required):
-            check_date = unique_dates[current_date_idx - i]
-            top_symbols_df = get_top_turnover_symbols(df, check_date, top_n)
-            if symbol not in top_symbols_df['Symbol'].values:
-                return False
+        current_date = pd.to_datetime(date_str, format='%Y-%m-%d')
         
-        return True
+        # Symbol must be in top N on this date and the previous (days_required - 1) trading days
+        return ranks.in_top_n(symbol, current_date, top_n, days_required)
     except Exception as e:
         print(f"Error checking turnover eligibility for {symbol}: {e}")
         return False
 
-def check_turnover_sell_condition(symbol, date_str):
+def check_turnover_sell_condition(symbol, date_str, settings=None):
     """Check if symbol has fallen below turnover threshold (triggers sell)"""
     try:
-        settings = get_settings()
+        settings = settings or get_settings()
         sell_threshold = settings.get('sell_turnover_threshold', 12)
         
         rank = get_turnover_rank(symbol, date_str)
@@ -1280,9 +1286,9 @@ def check_turnover_sell_condition(symbol, date_str):
 # SECTOR MANAGEMENT FUNCTIONS
 # ============================================================================
 
-def get_sector_info(symbol):
+def get_sector_info(symbol, cursor=None):
     """Get sector information for a symbol"""
-    with get_db() as cursor:
+    with use_db(cursor) as cursor:
         cursor.execute('''
             SELECT sector_name, max_positions 
             FROM sectors 
@@ -1296,9 +1302,9 @@ def get_sector_info(symbol):
             }
         return None
 
-def get_sector_positions(user_id, sector):
+def get_sector_positions(user_id, sector, cursor=None):
     """Get current open positions count in a sector for a user"""
-    with get_db() as cursor:
+    with use_db(cursor) as cursor:
         cursor.execute('''
             SELECT COUNT(*) as count
             FROM trade_cycles
@@ -1307,14 +1313,30 @@ def get_sector_positions(user_id, sector):
         result = cursor.fetchone()
         return result['count'] if result else 0
 
-def can_buy_in_sector(user_id, symbol):
-    """Check if user can buy in this symbol's sector"""
-    sector_info = get_sector_info(symbol)
+def check_position_limits(sector_info, sector_positions, total_positions, max_total):
+    """Apply the portfolio and sector limits to already-loaded counts"""
     if not sector_info:
         return False, "Symbol not found in sectors database"
     
-    # Get total open positions for user
-    with get_db() as cursor:
+    # Check total portfolio limit (10 positions max)
+    if total_positions >= max_total:
+        return False, f"Total portfolio limit reached ({total_positions}/{max_total} positions)"
+    
+    # Check sector limit
+    max_sector_positions = sector_info['max_positions']
+    if sector_positions >= max_sector_positions:
+        return False, f"Sector '{sector_info['sector']}' limit reached ({sector_positions}/{max_sector_positions})"
+    
+    return True, f"Available: {max_sector_positions - sector_positions}/{max_sector_positions} in sector, {max_total - total_positions}/{max_total} total portfolio"
+
+def can_buy_in_sector(user_id, symbol, cursor=None):
+    """Check if user can buy in this symbol's sector"""
+    with use_db(cursor) as cursor:
+        sector_info = get_sector_info(symbol, cursor)
+        if not sector_info:
+            return False, "Symbol not found in sectors database"
+        
+        # Get total open positions for user
         cursor.execute('''
             SELECT COUNT(*) as count
             FROM trade_cycles
@@ -1322,30 +1344,95 @@ def can_buy_in_sector(user_id, symbol):
         ''', (user_id,))
         total_positions = cursor.fetchone()['count']
         
-        # Get max total positions from settings
-        cursor.execute('''
-            SELECT value FROM global_settings WHERE key = 'max_total_positions'
-        ''')
-        max_total = int(cursor.fetchone()['value'])
+        current_sector_positions = get_sector_positions(user_id, sector_info['sector'], cursor)
     
-    # Check total portfolio limit (10 positions max)
-    if total_positions >= max_total:
-        return False, f"Total portfolio limit reached ({total_positions}/{max_total} positions)"
+    # Get max total positions from (cached) global settings
+    max_total = get_settings().get('max_total_positions', 10)
     
-    # Check sector limit
-    current_sector_positions = get_sector_positions(user_id, sector_info['sector'])
-    max_sector_positions = sector_info['max_positions']
+    return check_position_limits(sector_info, current_sector_positions, total_positions, max_total)
+
+class PortfolioState:
+    """Everything the scanner needs to apply buy limits for one user, loaded up front
+
+    Holds the sector map, the user's open cycles and the global settings so
+    limits are evaluated in memory. reserve() updates the running counters
+    as BUY signals are emitted during a scan.
+    """
     
-    if current_sector_positions >= max_sector_positions:
-        return False, f"Sector '{sector_info['sector']}' limit reached ({current_sector_positions}/{max_sector_positions})"
+    def __init__(self, sectors, open_cycles, global_settings):
+        self.sectors = sectors
+        self.global_settings = global_settings
+        self.max_total = global_settings.get('max_total_positions', 10)
+        self.total_positions = len(open_cycles)
+        self.sector_positions = Counter(cycle['sector'] for cycle in open_cycles)
+        
+        # Latest open cycle per symbol (rows arrive newest cycle first)
+        self.open_cycles = {}
+        for cycle in open_cycles:
+            self.open_cycles.setdefault(cycle['symbol'], cycle)
     
-    return True, f"Available: {max_sector_positions - current_sector_positions}/{max_sector_positions} in sector, {max_total - total_positions}/{max_total} total portfolio"
+    def can_buy(self, symbol):
+        sector_info = self.sectors.get(symbol)
+        sector_positions = self.sector_positions[sector_info['sector']] if sector_info else 0
+        return check_position_limits(sector_info, sector_positions, self.total_positions, self.max_total)
+    
+    def reserve(self, symbol):
+        """Count a BUY signal against the limits for the rest of the scan"""
+        self.total_positions += 1
+        self.sector_positions[self.sectors[symbol]['sector']] += 1
+
+def load_sectors(cursor=None):
+    """{symbol: {'sector', 'max_positions'}} for every symbol in the sectors table"""
+    with use_db(cursor) as cursor:
+        cursor.execute('SELECT symbol, sector_name, max_positions FROM sectors')
+        return {
+            row['symbol']: {'sector': row['sector_name'], 'max_positions': row['max_positions']}
+            for row in cursor.fetchall()
+        }
+
+def load_portfolio_state(user_id):
+    """Load sectors, the user's open cycles and global settings on one connection"""
+    with get_db() as cursor:
+        sectors = load_sectors(cursor)
+        
+        cursor.execute('''
+            SELECT * FROM trade_cycles
+            WHERE user_id = %s AND status = 'OPEN'
+            ORDER BY cycle_number DESC
+        ''', (user_id,))
+        open_cycles = [dict(row) for row in cursor.fetchall()]
+        
+    return PortfolioState(sectors, open_cycles, get_settings())
+
+def load_portfolio_states(user_ids, global_settings, cursor=None):
+    """{user_id: PortfolioState} for several users: sectors once, all open cycles in one query"""
+    with use_db(cursor) as cursor:
+        sectors = load_sectors(cursor)
+        
+        cursor.execute('''
+            SELECT * FROM trade_cycles
+            WHERE user_id = ANY(%s) AND status = 'OPEN'
+            ORDER BY user_id, cycle_number DESC
+        ''', (list(user_ids),))
+        open_cycles = defaultdict(list)
+        for row in cursor.fetchall():
+            open_cycles[row['user_id']].append(dict(row))
+    
+    return {
+        user_id: PortfolioState(sectors, open_cycles[user_id], global_settings)
+        for user_id in user_ids
+    }
 
 def get_user_portfolio_summary(user_id):
     """Get user's portfolio grouped by sector"""
-    with get_db() as cursor:
+    return get_portfolio_summaries([user_id]).get(user_id, [])
+
+def get_portfolio_summaries(user_ids, cursor=None):
+    """{user_id: portfolio grouped by sector} for several users in one query"""
+    with use_db(cursor) as cursor:
         cursor.execute('''
-            SELECT 
+            SELECT
+                tc.user_id,
                 tc.sector,
                 s.max_positions,
                 COUNT(*) as current_positions,
@@ -1353,14 +1440,14 @@ def get_user_portfolio_summary(user_id):
                 STRING_AGG(tc.symbol, ', ' ORDER BY tc.symbol) as symbols
             FROM trade_cycles tc
             JOIN sectors s ON tc.symbol = s.symbol
-            WHERE tc.user_id = %s AND tc.status = 'OPEN'
-            GROUP BY tc.sector, s.max_positions
-            ORDER BY tc.sector
-        ''', (user_id,))
+            WHERE tc.user_id = ANY(%s) AND tc.status = 'OPEN'
+            GROUP BY tc.user_id, tc.sector, s.max_positions
+            ORDER BY tc.user_id, tc.sector
+        ''', (list(user_ids),))
         
-        results = []
+        results = defaultdict(list)
         for row in cursor.fetchall():
-            results.append({
+            results[row['user_id']].append({
                 'sector': row['sector'],
                 'max_positions': row['max_positions'],
                 'current_positions': row['current_positions'],
@@ -1374,8 +1461,8 @@ def get_user_portfolio_summary(user_id):
 # DATABASE FUNCTIONS
 # ============================================================================
 
-def get_next_cycle_number(user_id, symbol):
-    with get_db() as cursor:
+def get_next_cycle_number(user_id, symbol, cursor=None):
+    with use_db(cursor) as cursor:
         cursor.execute('''
             SELECT MAX(cycle_number) as max_cycle 
             FROM trade_cycles 
@@ -1384,8 +1471,8 @@ def get_next_cycle_number(user_id, symbol):
         result = cursor.fetchone()
         return (result['max_cycle'] or 0) + 1
 
-def get_open_cycle(user_id, symbol):
-    with get_db() as cursor:
+def get_open_cycle(user_id, symbol, cursor=None):
+    with use_db(cursor) as cursor:
         cursor.execute('''
             SELECT * FROM trade_cycles 
             WHERE user_id = %s AND symbol = %s AND status = 'OPEN'
@@ -1395,14 +1482,49 @@ def get_open_cycle(user_id, symbol):
         result = cursor.fetchone()
         return dict(result) if result else None
 
-def create_buy_cycle(user_id, symbol, date, price, rsi):
+def get_cycles_version(user_id, cursor=None):
+    """Cheap fingerprint of a user's trade cycles - changes on every buy, sell and TSL update"""
+    return get_cycles_versions([user_id], cursor)[user_id]
+
+def get_cycles_versions(user_ids, cursor=None):
+    """{user_id: get_cycles_version(user_id)} in one query
+
+    users.cycles_version is bumped in the transaction of every change to the
+    user's cycles, so unlike MAX(updated_at) it moves on every commit whatever
+    order concurrent transactions started in.
+    """
+    with use_db(cursor) as cursor:
+        cursor.execute('SELECT id, cycles_version FROM users WHERE id = ANY(%s)', (list(user_ids),))
+        versions = {user_id: 0 for user_id in user_ids}
+        for row in cursor.fetchall():
+            versions[row['id']] = row['cycles_version']
+        return versions
+
+def bump_cycles_version(user_id, cursor):
+    """Mark the user's cycles as changed (see get_cycles_versions); call in the changing transaction"""
+    cursor.execute('UPDATE users SET cycles_version = cycles_version + 1 WHERE id = %s', (user_id,))
+
+def lock_user_cycles(user_id, cursor):
+    """Serialize trades for a user until the caller's transaction ends
+
+    The users row is locked too: with no open cycles there would be nothing
+    to lock, and two concurrent first buys could both pass the limits.
+    """
+    cursor.execute('SELECT id FROM users WHERE id = %s FOR UPDATE', (user_id,))
+    cursor.execute('''
+        SELECT id FROM trade_cycles
+        WHERE user_id = %s AND status = 'OPEN'
+        FOR UPDATE
+    ''', (user_id,))
+
+def create_buy_cycle(user_id, symbol, date, price, rsi, cursor=None):
     """Create a new buy cycle with sector information"""
-    sector_info = get_sector_info(symbol)
-    sector = sector_info['sector'] if sector_info else 'Unknown'
-    
-    cycle_number = get_next_cycle_number(user_id, symbol)
-    
-    with get_db() as cursor:
+    with use_db(cursor) as cursor:
+        sector_info = get_sector_info(symbol, cursor)
+        sector = sector_info['sector'] if sector_info else 'Unknown'
+        
+        cycle_number = get_next_cycle_number(user_id, symbol, cursor)
+        
         cursor.execute('''
             INSERT INTO trade_cycles (
                 user_id, symbol, sector, cycle_number, status, buy_date, buy_price, buy_rsi,
@@ -1417,44 +1539,57 @@ def create_buy_cycle(user_id, symbol, date, price, rsi):
             INSERT INTO price_tracking (cycle_id, date, close_price, tsl_price, is_new_high)
             VALUES (%s, %s, %s, %s, %s)
         ''', (cycle_id, date, price, price * 0.95, True))
+        bump_cycles_version(user_id, cursor)
         
         return cycle_number
 
-def update_tsl(cycle_id, date, current_price):
-    with get_db() as cursor:
-        cursor.execute('''
-            SELECT highest_price_after_buy, tsl_trigger_price 
-            FROM trade_cycles 
-            WHERE id = %s
-        ''', (cycle_id,))
-        result = cursor.fetchone()
-        highest_price = float(result['highest_price_after_buy'])
-        current_tsl = float(result['tsl_trigger_price'])
-        
-        is_new_high = False
-        if current_price > highest_price:
-            highest_price = current_price
-            current_tsl = current_price * 0.95
-            is_new_high = True
-            
+def apply_tsl_updates(tracking, cursor=None):
+    """Store the TSL moves and daily prices collected by scans (see scan_all_symbols)
+
+    tracking: (cycle_id, date, close_price, tsl_price, is_new_high) per open cycle.
+    New highs go to trade_cycles in one UPDATE ... FROM (VALUES ...), and every
+    cycle gets its price_tracking row for the date unless it already has one,
+    so running the same day twice changes nothing.
+    Returns (cycles updated, price_tracking rows inserted).
+    """
+    if not tracking:
+        return 0, 0
+    highs = [(cycle_id, price, tsl) for cycle_id, _, price, tsl, is_new_high in tracking if is_new_high]
+    with use_db(cursor) as cursor:
+        updated = 0
+        if highs:
+            # Users rows first, the same lock order as a trade (lock_user_cycles)
             cursor.execute('''
-                UPDATE trade_cycles 
-                SET highest_price_after_buy = %s, 
-                    tsl_trigger_price = %s,
+                UPDATE users SET cycles_version = cycles_version + 1
+                WHERE id IN (SELECT user_id FROM trade_cycles WHERE id = ANY(%s))
+            ''', ([cycle_id for cycle_id, _, _ in highs],))
+            execute_values(cursor, '''
+                UPDATE trade_cycles AS tc
+                SET highest_price_after_buy = v.price,
+                    tsl_trigger_price = v.tsl,
                     updated_at = CURRENT_TIMESTAMP
-                WHERE id = %s
-            ''', (highest_price, current_tsl, cycle_id))
-        
-        cursor.execute('''
+                FROM (VALUES %s) AS v(id, price, tsl)
+                WHERE tc.id = v.id
+                  AND tc.status = 'OPEN'
+                  AND v.price > tc.highest_price_after_buy
+            ''', highs, template='(%s::integer, %s::numeric, %s::numeric)', page_size=len(highs))
+            updated = cursor.rowcount
+        
+        execute_values(cursor, '''
             INSERT INTO price_tracking (cycle_id, date, close_price, tsl_price, is_new_high)
-            VALUES (%s, %s, %s, %s, %s)
-        ''', (cycle_id, date, current_price, current_tsl, is_new_high))
-        
-        return current_tsl, is_new_high
+            SELECT v.cycle_id, v.date, v.close_price, v.tsl_price, v.is_new_high
+            FROM (VALUES %s) AS v(cycle_id, date, close_price, tsl_price, is_new_high)
+            WHERE NOT EXISTS (
+                SELECT 1 FROM price_tracking p
+                WHERE p.cycle_id = v.cycle_id AND p.date = v.date
+            )
+        ''', tracking, template='(%s::integer, %s::date, %s::numeric, %s::numeric, %s::boolean)',
+            page_size=len(tracking))
+        return updated, cursor.rowcount
 
-def close_cycle(cycle_id, date, price, rsi, reason='AUTOMATIC'):
-    with get_db() as cursor:
-        cursor.execute('SELECT buy_price FROM trade_cycles WHERE id = %s', (cycle_id,))
+def close_cycle(cycle_id, date, price, rsi, reason='AUTOMATIC', cursor=None):
+    with use_db(cursor) as cursor:
+        cursor.execute('SELECT user_id, buy_price FROM trade_cycles WHERE id = %s', (cycle_id,))
         result = cursor.fetchone()
         buy_price = float(result['buy_price'])
         
@@ -1473,11 +1608,20 @@ def close_cycle(cycle_id, date, price, rsi, reason='AUTOMATIC'):
                 updated_at = CURRENT_TIMESTAMP
             WHERE id = %s
         ''', (date, price, rsi, profit_loss, profit_loss_percent, reason, cycle_id))
+        bump_cycles_version(result['user_id'], cursor)
         
         return profit_loss, profit_loss_percent
 
 def get_settings(user_id=None):
-    """Get settings - user-specific or global defaults"""
+    """Get settings - user-specific or global defaults (cached, see settings_cache)"""
+    return dict(settings_cache.get(user_id, lambda: load_settings(user_id)))
+
+def settings_version():
+    """Counter that changes whenever cached settings are invalidated"""
+    return settings_cache.version
+
+def load_settings(user_id=None):
+    """Read settings from the database - user-specific or global defaults"""
     with get_db() as cursor:
         if user_id:
             cursor.execute('SELECT key, value FROM user_settings WHERE user_id = %s', (user_id,))
@@ -1489,9 +1633,115 @@ def get_settings(user_id=None):
         global_settings = {row['key']: int(row['value']) for row in cursor.fetchall()}
         return global_settings
 
-def scan_all_symbols(user_id, upper_threshold=None, lower_threshold=None, rsi_period=None):
-    """Scan all symbols - uses passed thresholds or gets from database"""
-    if not os.path.exists(DATA_FILE):
+def load_all_settings(user_ids, cursor=None):
+    """(global settings, {user_id: settings}) - load_settings for several users in two queries"""
+    with use_db(cursor) as cursor:
+        cursor.execute('SELECT key, value FROM global_settings')
+        global_settings = {row['key']: int(row['value']) for row in cursor.fetchall()}
+        
+        cursor.execute('SELECT user_id, key, value FROM user_settings WHERE user_id = ANY(%s)', (list(user_ids),))
+        user_settings = defaultdict(dict)
+        for row in cursor.fetchall():
+            user_settings[row['user_id']][row['key']] = int(row['value'])
+        
+        return global_settings, {
+            user_id: user_settings.get(user_id) or dict(global_settings) for user_id in user_ids
+        }
+
+# ============================================================================
+# RSI STATE (persisted Wilder averages, see rsi.RsiState)
+# ============================================================================
+
+def rsi_periods_in_use(cursor=None):
+    """Distinct RSI periods of the global and all user settings (14 is the fallback default)"""
+    with use_db(cursor) as cursor:
+        cursor.execute('''
+            SELECT value FROM global_settings WHERE key = 'default_rsi_period'
+            UNION
+            SELECT value FROM user_settings WHERE key = 'default_rsi_period'
+        ''')
+        return sorted({int(row['value']) for row in cursor.fetchall()} | {14})
+
+def save_rsi_states(snapshot, periods=None, cursor=None):
+    """Upsert every symbol's RSI state for each period (default: every period in use)
+
+    Only the append endpoint and the EOD pipeline write these; scans read the
+    in-memory state of the snapshot.
+    """
+    version = data_version(snapshot.fingerprint)
+    with use_db(cursor) as cursor:
+        periods = periods or rsi_periods_in_use(cursor)
+        for period in periods:
+            execute_values(cursor, '''
+                INSERT INTO rsi_state
+                    (period, symbol, as_of_date, avg_gain, avg_loss, last_close, n_obs, sum_gain, sum_loss,
+                     data_version)
+                VALUES %s
+                ON CONFLICT (period, symbol) DO UPDATE SET
+                    data_version = EXCLUDED.data_version,
+                    as_of_date = EXCLUDED.as_of_date,
+                    avg_gain = EXCLUDED.avg_gain,
+                    avg_loss = EXCLUDED.avg_loss,
+                    last_close = EXCLUDED.last_close,
+                    n_obs = EXCLUDED.n_obs,
+                    sum_gain = EXCLUDED.sum_gain,
+                    sum_loss = EXCLUDED.sum_loss,
+                    updated_at = CURRENT_TIMESTAMP
+            ''', [(*record, version) for record in rsi_state(snapshot, period).records()], page_size=1000)
+            # Rows left from older data, e.g. symbols no longer in it
+            cursor.execute(
+                'DELETE FROM rsi_state WHERE period = %s AND data_version IS DISTINCT FROM %s',
+                (period, version)
+            )
+    return periods
+
+def load_rsi_state(snapshot, period):
+    """RsiState for period from the database, or None if it does not match the loaded data
+
+    Only rows saved from the same data version count: a corrected historical
+    close changes the file but not the row count or the last date.
+    """
+    with get_db() as cursor:
+        cursor.execute('''
+            SELECT symbol, as_of_date, avg_gain, avg_loss, last_close, n_obs, sum_gain, sum_loss
+            FROM rsi_state WHERE period = %s AND data_version = %s
+        ''', (period, data_version(snapshot.fingerprint)))
+        rows = cursor.fetchall()
+    
+    frame = snapshot.frame
+    if not rows or frame.empty:
+        return None
+    # Same symbols, same last date and the same number of rows seen as the data
+    if ({row['symbol'] for row in rows} != set(snapshot.symbols)
+            or sum(row['n_obs'] for row in rows) != len(frame)
+            or max(row['as_of_date'] for row in rows) != frame['Date'].iloc[-1].date()):
+        return None
+    return RsiState.from_records(snapshot.symbols, period, rows)
+
+def seed_rsi_states(snapshot):
+    """Seed a freshly loaded snapshot with the saved RSI states that match its data
+
+    Read-only; periods without a current saved state are built from the price
+    history on first use and saved by the next EOD pipeline run.
+    """
+    try:
+        for period in rsi_periods_in_use():
+            state = load_rsi_state(snapshot, period)
+            if state is not None:
+                snapshot.seed(('rsi_state', period), state)
+    except Exception as e:
+        print(f"Error loading RSI states: {e}")
+
+def scan_all_symbols(user_id, upper_threshold=None, lower_threshold=None, rsi_period=None,
+                     portfolio=None, tracking=None):
+    """Scan all symbols - uses passed thresholds or gets from database
+
+    Read-only: a new high only moves the TSL in the returned rows. Pass a
+    tracking list to collect the rows apply_tsl_updates() stores (the EOD
+    pipeline does), and a preloaded portfolio to skip loading it.
+    """
+    snapshot = market_store.get()
+    if snapshot is None:
         return []
     
     # Get settings from database if not provided
@@ -1501,60 +1751,38 @@ def scan_all_symbols(user_id, upper_threshold=None, lower_threshold=None, rsi_pe
         lower_threshold = lower_threshold or settings.get('default_lower_threshold', 30)
         rsi_period = rsi_period or settings.get('default_rsi_period', 14)
     
-    df = pd.read_csv(DATA_FILE)
-    df['Symbol'] = df['Symbol'].astype(str).str.strip()
-    df = df[df['Symbol'].notna()]
-    df = df[df['Symbol'] != 'nan']
-    df = df[df['Symbol'] != '']
-    symbols = df['Symbol'].unique()
     results = []
     
-    for symbol in symbols:
-        try:
-            symbol_df = df[df['Symbol'] == symbol].copy()
-            if len(symbol_df) < rsi_period + 1:
-                continue
-            
-            symbol_df['Date'] = pd.to_datetime(symbol_df['Date'], format='%d/%m/%Y', errors='coerce')
-            symbol_df = symbol_df.dropna(subset=['Date'])
-            symbol_df = symbol_df.sort_values('Date').reset_index(drop=True)
-            
-            for col in ['Open', 'High', 'Low', 'Close']:
-                if col in symbol_df.columns:
-                    symbol_df[col] = symbol_df[col].apply(clean_numeric_value)
-            
-            symbol_df['RSI'] = calculate_rsi(symbol_df['Close'], period=rsi_period)
-            
-            if symbol_df['RSI'].isna().all():
-                continue
-            
-            latest = symbol_df.iloc[-1]
-            latest_rsi = float(latest['RSI']) if not pd.isna(latest['RSI']) else None
-            
-            if latest_rsi is None:
-                continue
-            
-            current_price = float(latest['Close'])
-            current_date = latest['Date'].strftime('%Y-%m-%d')
-        except Exception as e:
-            print(f"Error processing symbol {symbol}: {e}")
-            continue
+    # Sectors, open cycles and limits in a fixed handful of queries
+    if portfolio is None:
+        portfolio = load_portfolio_state(user_id)
+    
+    # User-independent part of every symbol's signal, shared by all users
+    # scanning the same data with the same RSI period (in memory only - the
+    # saved RSI states are loaded and written by the data load and EOD paths)
+    for market in market_signals(snapshot, rsi_period, portfolio.global_settings):
+        symbol = market['symbol']
+        latest_rsi_value = market['rsi']
+        current_price = market['close']
+        current_date = market['date']
+        turnover_rank = market['turnover_rank']
         
         # Get sector info
-        sector_info = get_sector_info(symbol)
+        sector_info = portfolio.sectors.get(symbol)
         sector = sector_info['sector'] if sector_info else 'Unknown'
         max_positions = sector_info['max_positions'] if sector_info else 3
         
-        open_cycle = get_open_cycle(user_id, symbol)
+        open_cycle = portfolio.open_cycles.get(symbol)
         
         if open_cycle:
             # SELL CONDITIONS for open positions
             tsl_price = float(open_cycle['tsl_trigger_price'])
+            is_new_high = False
             
             # Check all sell conditions
-            rsi_sell = latest_rsi < lower_threshold
+            rsi_sell = latest_rsi_value < lower_threshold
             tsl_sell = current_price < tsl_price
-            turnover_sell = check_turnover_sell_condition(symbol, current_date)
+            turnover_sell = market['turnover_sell']
             
             if rsi_sell or tsl_sell or turnover_sell:
                 signal = 'SELL'
@@ -1569,33 +1797,35 @@ def scan_all_symbols(user_id, upper_threshold=None, lower_threshold=None, rsi_pe
                     sell_reason = 'TURNOVER'
                 else:
                     sell_reason = 'MULTIPLE'
-                
-                # Get turnover rank for display
-                turnover_rank = get_turnover_rank(symbol, current_date, df)
             else:
                 # Update TSL if new high
                 if current_price > float(open_cycle['highest_price_after_buy']):
-                    update_tsl(open_cycle['id'], current_date, current_price)
-                    open_cycle = get_open_cycle(user_id, symbol)
+                    tsl_price = current_price * 0.95
+                    is_new_high = True
+                    open_cycle['highest_price_after_buy'] = current_price
+                    open_cycle['tsl_trigger_price'] = tsl_price
                 
                 signal = 'HOLD'
                 signal_class = 'neutral'
                 sell_reason = None
-                turnover_rank = get_turnover_rank(symbol, current_date, df)
+            
+            if tracking is not None:
+                tracking.append((open_cycle['id'], current_date, current_price, tsl_price, is_new_high))
         else:
             # BUY CONDITIONS for new positions
-            turnover_rank = get_turnover_rank(symbol, current_date, df)
+            sell_reason = None
             
-            if latest_rsi > upper_threshold:
+            if latest_rsi_value > upper_threshold:
                 # Check turnover eligibility
-                turnover_eligible = check_turnover_eligibility(symbol, current_date)
+                turnover_eligible = market['turnover_eligible']
                 
-                # Check sector limit
-                can_buy, sector_msg = can_buy_in_sector(user_id, symbol)
+                # Check sector limit (counts include BUY signals already emitted in this scan)
+                can_buy, sector_msg = portfolio.can_buy(symbol)
                 
                 if turnover_eligible and can_buy:
                     signal = 'BUY'
                     signal_class = 'buy'
+                    portfolio.reserve(symbol)
                 elif not turnover_eligible:
                     signal = 'NEUTRAL'
                     signal_class = 'neutral'
@@ -1618,7 +1848,7 @@ def scan_all_symbols(user_id, upper_threshold=None, lower_threshold=None, rsi_pe
             'sector': sector,
             'max_sector_positions': max_positions,
             'current_price': current_price,
-            'current_rsi': round(latest_rsi, 2),
+            'current_rsi': round(latest_rsi_value, 2),
             'signal': signal,
             'signal_class': signal_class,
             'date': current_date,
@@ -1637,6 +1867,375 @@ def scan_all_symbols(user_id, upper_threshold=None, lower_threshold=None, rsi_pe
     
     return results
 
+# ============================================================================
+# BACKTEST JOBS (queued in backtest_jobs, see backtest.py and sweep.py)
+# ============================================================================
+
+BACKTEST_JOB_WORKERS = int(os.getenv('BACKTEST_JOB_WORKERS', '1'))
+BACKTEST_SWEEP_WORKERS = int(os.getenv('BACKTEST_SWEEP_WORKERS', str(os.cpu_count() or 1)))
+BACKTEST_SWEEP_MAX_COMBINATIONS = int(os.getenv('BACKTEST_SWEEP_MAX_COMBINATIONS', '1000'))
+BACKTEST_EQUITY_POINTS = 400
+# A RUNNING job refreshes heartbeat_at every third of the lease; once the lease
+# has expired its worker is gone (timeout, restart, deploy) and it is requeued,
+# up to BACKTEST_JOB_MAX_ATTEMPTS runs
+BACKTEST_JOB_LEASE_SECONDS = int(os.getenv('BACKTEST_JOB_LEASE_SECONDS', '120'))
+BACKTEST_JOB_MAX_ATTEMPTS = int(os.getenv('BACKTEST_JOB_MAX_ATTEMPTS', '2'))
+BACKTEST_JOB_FIELDS = ('id, kind, params, data_version, status, progress, error, attempts, '
+                       'created_by, created_at, started_at, heartbeat_at, finished_at')
+BACKTEST_JOB_EXPIRED = (f"status = 'RUNNING' AND COALESCE(heartbeat_at, started_at) < "
+                        f"CURRENT_TIMESTAMP - make_interval(secs => {BACKTEST_JOB_LEASE_SECONDS})")
+
+# Jobs run on a thread of the worker that queued them; the table holds their
+# state, so any worker can answer a poll.
+backtest_executor = ThreadPoolExecutor(max_workers=BACKTEST_JOB_WORKERS, thread_name_prefix='backtest')
+
+def data_version(fingerprint):
+    """Market data version stored with a job: the data file's mtime_ns-size"""
+    return 'missing' if fingerprint is None else f"{fingerprint[0]}-{fingerprint[1]}"
+
+def setting_number(key, value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Setting '{key}' must be a number")
+    return int(value) if value.is_integer() else value
+
+def backtest_job_params(data):
+    """Validate a POST /api/admin/backtests body into (kind, params)
+
+    Settings that are not given come from the global settings, so params
+    (and their hash) describe the complete run.
+    """
+    kind = data.get('type', 'backtest')
+    if kind not in ('backtest', 'sweep'):
+        raise ValueError("type must be 'backtest' or 'sweep'")
+    
+    global_settings = get_settings()
+    settings = {key: setting_number(key, global_settings.get(key, default)) for key, default in DEFAULT_SETTINGS.items()}
+    for key, value in (data.get('settings') or {}).items():
+        if key not in DEFAULT_SETTINGS:
+            raise ValueError(f"Unknown setting '{key}'")
+        settings[key] = setting_number(key, value)
+    params = {'settings': settings}
+    
+    if kind == 'sweep':
+        grid = data.get('grid') or {}
+        if not grid:
+            raise ValueError('grid is required for a sweep')
+        for key, values in grid.items():
+            if key not in SWEEP_KEYS:
+                raise ValueError(f"Setting '{key}' cannot be swept")
+            if not isinstance(values, list) or not values:
+                raise ValueError(f"grid.{key} must be a non-empty list")
+        params['grid'] = {key: sorted({setting_number(key, value) for value in values}) for key, values in grid.items()}
+        combinations = math.prod(len(values) for values in params['grid'].values())
+        if combinations > BACKTEST_SWEEP_MAX_COMBINATIONS:
+            raise ValueError(f"grid has {combinations} combinations (max {BACKTEST_SWEEP_MAX_COMBINATIONS})")
+    return kind, params
+
+def params_hash(kind, params):
+    payload = json.dumps({'kind': kind, **params}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def format_backtest_job(row):
+    job = dict(row)
+    for key in ('created_at', 'started_at', 'heartbeat_at', 'finished_at'):
+        job[key] = job[key].isoformat() if job.get(key) else None
+    return job
+
+def requeue_expired_backtest_jobs(cursor):
+    """Requeue RUNNING jobs whose lease expired - their worker died mid-run
+
+    A job that already had BACKTEST_JOB_MAX_ATTEMPTS runs is marked FAILED instead.
+    """
+    cursor.execute(f"""
+        UPDATE backtest_jobs
+        SET status = CASE WHEN attempts >= %(max_attempts)s THEN 'FAILED' ELSE 'QUEUED' END,
+            error = CASE WHEN attempts >= %(max_attempts)s
+                         THEN 'Worker stopped responding' ELSE error END,
+            finished_at = CASE WHEN attempts >= %(max_attempts)s
+                               THEN CURRENT_TIMESTAMP ELSE finished_at END
+        WHERE {BACKTEST_JOB_EXPIRED}
+    """, {'max_attempts': BACKTEST_JOB_MAX_ATTEMPTS})
+    return cursor.rowcount
+
+def enqueue_backtest_job(admin_id, kind, params):
+    """Return (job, created) - the job already run or queued for these params and data, or a new one"""
+    digest = params_hash(kind, params)
+    version = data_version(market_store.fingerprint())
+    with get_db() as cursor:
+        # A job whose worker died is requeued (or failed) before it can be matched
+        requeued = requeue_expired_backtest_jobs(cursor)
+        cursor.execute(f"""
+            SELECT {BACKTEST_JOB_FIELDS}, result FROM backtest_jobs
+            WHERE params_hash = %s AND data_version = %s AND status <> 'FAILED'
+            ORDER BY (status = 'DONE') DESC, id DESC
+            LIMIT 1
+        """, (digest, version))
+        job = cursor.fetchone()
+        if job:
+            if requeued:
+                backtest_executor.submit(run_queued_backtest_jobs)
+            return job, False
+        
+        cursor.execute(f"""
+            INSERT INTO backtest_jobs (kind, params, params_hash, data_version, created_by)
+            VALUES (%s, %s, %s, %s, %s)
+            RETURNING {BACKTEST_JOB_FIELDS}, result
+        """, (kind, Json(params), digest, version, admin_id))
+        job = cursor.fetchone()
+    
+    backtest_executor.submit(run_queued_backtest_jobs)
+    return job, True
+
+def claim_backtest_job():
+    """Mark the oldest QUEUED job RUNNING and return it (None if the queue is empty)
+
+    Expired RUNNING jobs are requeued first. SKIP LOCKED lets several workers
+    drain the queue without taking the same job.
+    """
+    with get_db() as cursor:
+        requeue_expired_backtest_jobs(cursor)
+        cursor.execute("""
+            UPDATE backtest_jobs
+            SET status = 'RUNNING', started_at = CURRENT_TIMESTAMP,
+                heartbeat_at = CURRENT_TIMESTAMP, attempts = attempts + 1
+            WHERE id = (
+                SELECT id FROM backtest_jobs
+                WHERE status = 'QUEUED'
+                ORDER BY id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, kind, params
+        """)
+        return cursor.fetchone()
+
+def update_backtest_job(job_id, **fields):
+    assignments = ', '.join(f"{column} = %s" for column in fields)
+    with get_db() as cursor:
+        cursor.execute(f'UPDATE backtest_jobs SET {assignments} WHERE id = %s', (*fields.values(), job_id))
+
+@contextmanager
+def backtest_job_heartbeat(job_id):
+    """Refresh the job's heartbeat_at every third of the lease while the block runs"""
+    stop = threading.Event()
+    
+    def beat():
+        while not stop.wait(BACKTEST_JOB_LEASE_SECONDS / 3):
+            try:
+                with get_db() as cursor:
+                    cursor.execute(
+                        "UPDATE backtest_jobs SET heartbeat_at = CURRENT_TIMESTAMP WHERE id = %s AND status = 'RUNNING'",
+                        (job_id,)
+                    )
+            except Exception as e:
+                print(f"Error recording heartbeat of backtest job {job_id}: {e}")
+    
+    thread = threading.Thread(target=beat, name=f'backtest-heartbeat-{job_id}', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+def frame_records(frame):
+    """DataFrame rows as dicts, NaN as None (JSONB rejects NaN)"""
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+def run_backtest_job(job):
+    """Compute a claimed job; returns (result, data version it ran on)"""
+    snapshot = market_store.get()
+    if snapshot is None:
+        raise RuntimeError('Market data file not found')
+    market = snapshot.derived('backtest_market', MarketArrays.from_frame)
+    sectors = load_sectors()
+    params = job['params']
+    
+    if job['kind'] == 'sweep':
+        reported = [0.0]
+        
+        def progress(done, total):
+            # At most one progress write per second
+            now = time.monotonic()
+            if done < total and now - reported[0] < 1.0:
+                return
+            reported[0] = now
+            update_backtest_job(job['id'], progress=done / total)
+        
+        grid = [{**params['settings'], **combo} for combo in settings_grid(**params['grid'])]
+        # spawn, not fork: this process runs request threads
+        results = run_sweep(market, grid, sectors, BACKTEST_SWEEP_WORKERS, progress,
+                            mp_context=multiprocessing.get_context('spawn'))
+        result = {'combinations': len(results), 'results': frame_records(results)}
+    else:
+        run = run_backtest(market, params['settings'], sectors)
+        equity = run.equity
+        equity = equity.iloc[lttb_indices([equity['equity'].to_numpy()], BACKTEST_EQUITY_POINTS)]
+        result = {
+            'summary': run.summary(),
+            'sectors': frame_records(run.sector_stats()),
+            'equity': {
+                'dates': equity['date'].dt.strftime('%Y-%m-%d').tolist(),
+                'equity': equity['equity'].round(6).tolist(),
+                'open_positions': equity['open_positions'].tolist()
+            }
+        }
+    return result, data_version(snapshot.fingerprint)
+
+def run_queued_backtest_jobs():
+    """Run QUEUED jobs until there are none left (on backtest_executor)"""
+    while True:
+        try:
+            job = claim_backtest_job()
+            if job is None:
+                return
+            try:
+                with backtest_job_heartbeat(job['id']):
+                    result, version = run_backtest_job(job)
+                update_backtest_job(
+                    job['id'], status='DONE', progress=1.0, data_version=version,
+                    result=Json(result, dumps=lambda value: json.dumps(value, default=json_default)),
+                    finished_at=datetime.now()
+                )
+            except Exception as e:
+                update_backtest_job(job['id'], status='FAILED', error=str(e), finished_at=datetime.now())
+        except Exception as e:
+            print(f"Error running backtest jobs: {e}")
+            return
+
+# ============================================================================
+# END-OF-DAY PIPELINE (run by scheduler.py after each data load)
+# ============================================================================
+
+# pg advisory lock key: one pipeline run at a time across all processes
+EOD_PIPELINE_LOCK = 0x454F44
+
+# Runs the pipeline after an append without holding up the request
+pipeline_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='eod')
+
+def scan_snapshot_key(user_id, settings, global_settings, fingerprint, cycles_version):
+    """Hash of everything a user's scan reads - the same in every process"""
+    payload = json.dumps([
+        user_id,
+        sorted(settings.items()),
+        sorted(global_settings.items()),
+        fingerprint,
+        cycles_version
+    ], default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+# (user_id, as_of_date) of stale scan snapshots already warned about
+_stale_snapshot_warnings = set()
+
+def load_scan_snapshot(user_id, key):
+    """Stored /api/scanner body for the user if it was built from the current inputs (None otherwise)
+
+    Warns (once per user and snapshot date) when the stored snapshot is older
+    than the loaded market data - the EOD pipeline has not run for the latest
+    day (is scheduler.py running?).
+    """
+    with get_db() as cursor:
+        cursor.execute(
+            'SELECT as_of_date, CASE WHEN scan_key = %s THEN payload::text END AS payload '
+            'FROM scan_snapshots WHERE user_id = %s',
+            (key, user_id)
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    
+    snapshot = market_store.get()
+    if snapshot is not None and not snapshot.frame.empty:
+        latest = snapshot.frame['Date'].iloc[-1].date()
+        if row['as_of_date'] < latest and (user_id, row['as_of_date']) not in _stale_snapshot_warnings:
+            _stale_snapshot_warnings.add((user_id, row['as_of_date']))
+            print(f"⚠️  Scan snapshot of user {user_id} is from {row['as_of_date']}, market data is at {latest} "
+                  f"- the EOD pipeline has not run (start scheduler.py)")
+    return row['payload'].encode('utf-8') if row['payload'] is not None else None
+
+def run_eod_pipeline():
+    """Scan every active user, store TSL updates and scan snapshots in one transaction
+
+    Returns run statistics, or None when there is no data or another process
+    is already running the pipeline.
+    """
+    snapshot = market_store.get()
+    if snapshot is None or snapshot.frame.empty:
+        return None
+    start = time.perf_counter()
+    
+    with get_db() as cursor:
+        cursor.execute('SELECT pg_try_advisory_xact_lock(%s) AS locked', (EOD_PIPELINE_LOCK,))
+        if not cursor.fetchone()['locked']:
+            return None
+        
+        cursor.execute('SELECT id FROM users WHERE is_active = TRUE ORDER BY id')
+        user_ids = [row['id'] for row in cursor.fetchall()]
+        global_settings, user_settings = load_all_settings(user_ids, cursor)
+        portfolios = load_portfolio_states(user_ids, global_settings, cursor)
+        
+        # Users with the same RSI period share the snapshot's market signals
+        scans = {}
+        tracking = []
+        for user_id in user_ids:
+            settings = user_settings[user_id]
+            scans[user_id] = scan_all_symbols(
+                user_id,
+                settings.get('default_upper_threshold', 70),
+                settings.get('default_lower_threshold', 30),
+                settings.get('default_rsi_period', 14),
+                portfolio=portfolios[user_id],
+                tracking=tracking
+            )
+        tsl_updated, tracked = apply_tsl_updates(tracking, cursor)
+        # Next process to load this data seeds its RSI states from here
+        save_rsi_states(snapshot, cursor=cursor)
+        
+        # Keyed on the cycles as this transaction leaves them
+        cycles_versions = get_cycles_versions(user_ids, cursor)
+        summaries = get_portfolio_summaries(user_ids, cursor)
+        as_of = snapshot.frame['Date'].iloc[-1].date()
+        version = data_version(snapshot.fingerprint)
+        rows = []
+        for user_id in user_ids:
+            settings = user_settings[user_id]
+            key = scan_snapshot_key(user_id, settings, global_settings, snapshot.fingerprint, cycles_versions[user_id])
+            payload = scanner_response(scans[user_id], settings, summaries.get(user_id, []))
+            rows.append((user_id, key, version, as_of, Json(payload, dumps=app.json.dumps)))
+        
+        if rows:
+            execute_values(cursor, """
+                INSERT INTO scan_snapshots (user_id, scan_key, data_version, as_of_date, payload)
+                VALUES %s
+                ON CONFLICT (user_id) DO UPDATE SET
+                    scan_key = EXCLUDED.scan_key,
+                    data_version = EXCLUDED.data_version,
+                    as_of_date = EXCLUDED.as_of_date,
+                    payload = EXCLUDED.payload,
+                    created_at = CURRENT_TIMESTAMP
+            """, rows, page_size=100)
+    
+    return {
+        'users': len(user_ids),
+        'data_version': version,
+        'as_of_date': as_of.isoformat(),
+        'open_cycles': len(tracking),
+        'tsl_updated': tsl_updated,
+        'price_tracking_rows': tracked,
+        'snapshots': len(rows),
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 1)
+    }
+
+def run_eod_pipeline_logged():
+    try:
+        stats = run_eod_pipeline()
+        print(f"EOD pipeline: {stats if stats else 'skipped (no data or already running)'}")
+        return stats
+    except Exception as e:
+        print(f"Error running EOD pipeline: {e}")
+
 # ============================================================================
 # AUTH ROUTES
 # ============================================================================
@@ -1807,16 +2406,146 @@ def update_admin_settings(admin_id):
             updated = cursor.fetchone()
             if not updated:
                 return jsonify({'error': 'Setting not found'}), 404
-            
-            return jsonify({
-                'success': True,
-                'message': f'Updated {key} to {value}',
-                'setting': {
-                    'key': updated['key'],
-                    'value': int(updated['value']),
-                    'description': updated['description']
-                }
-            })
+        
+        # Users without overrides fall back to global settings, so drop every entry
+        settings_cache.invalidate()
+        
+        return jsonify({
+            'success': True,
+            'message': f'Updated {key} to {value}',
+            'setting': {
+                'key': updated['key'],
+                'value': int(updated['value']),
+                'description': updated['description']
+            }
+        })
+    except Exception as e:
+        import traceback
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+@app.route('/api/admin/metrics', methods=['GET'])
+@admin_required
+def get_admin_metrics(admin_id):
+    """Get runtime metrics for this worker process"""
+    try:
+        return jsonify({
+            'pid': os.getpid(),
+            'pool': connection_pool.stats() if connection_pool else None,
+            'scanner_cache': scanner_cache.stats(),
+            'memory': process_memory()
+        })
+    except Exception as e:
+        import traceback
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+@app.route('/api/admin/market-data/append', methods=['POST'])
+@admin_required
+def append_market_data(admin_id):
+    """Append one new trading day (CSV upload or raw CSV body) to the market data"""
+    try:
+        upload = request.files.get('file')
+        content = upload.read() if upload else request.get_data()
+        if not content:
+            return jsonify({'error': 'No CSV data provided'}), 400
+        
+        with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as f:
+            f.write(content)
+            day_path = f.name
+        try:
+            start = datetime.now()
+            snapshot = market_store.append_day(day_path, carry_forward=carry_forward)
+            elapsed = (datetime.now() - start).total_seconds() * 1000
+        finally:
+            os.remove(day_path)
+        
+        # Stepped RSI states go to the database so other workers skip the rebuild
+        save_rsi_states(snapshot)
+        # New day: store TSL moves and fresh scans for every user
+        pipeline_executor.submit(run_eod_pipeline_logged)
+        
+        return jsonify({
+            'success': True,
+            'date': snapshot.frame['Date'].iloc[-1].strftime('%Y-%m-%d'),
+            'rows': len(snapshot.frame),
+            'symbols': len(snapshot.symbols),
+            'elapsed_ms': round(elapsed, 1)
+        })
+    except (ValueError, FileNotFoundError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        import traceback
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+@app.route('/api/admin/eod-pipeline', methods=['POST'])
+@admin_required
+def run_eod_pipeline_now(admin_id):
+    """Run the end-of-day pipeline now and return its statistics"""
+    try:
+        stats = run_eod_pipeline()
+        if stats is None:
+            return jsonify({'error': 'No market data, or the pipeline is already running'}), 409
+        return jsonify({'success': True, 'stats': stats})
+    except Exception as e:
+        import traceback
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+@app.route('/api/admin/backtests', methods=['POST'])
+@admin_required
+def create_backtest_job(admin_id):
+    """Queue a backtest ({type: 'backtest', settings}) or a sweep ({type: 'sweep', settings, grid})
+
+    The same params on the same market data return the existing job - with
+    its result when it has finished - instead of running again.
+    """
+    try:
+        kind, params = backtest_job_params(request.json or {})
+        job, created = enqueue_backtest_job(admin_id, kind, params)
+        return jsonify({
+            'success': True,
+            'cached': not created,
+            'job': format_backtest_job(job)
+        }), 200 if job['status'] == 'DONE' else 202
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        import traceback
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+@app.route('/api/admin/backtests', methods=['GET'])
+@admin_required
+def list_backtest_jobs(admin_id):
+    """Most recent backtest jobs, without their results"""
+    try:
+        with get_db() as cursor:
+            cursor.execute(f"""
+                SELECT {BACKTEST_JOB_FIELDS} FROM backtest_jobs
+                ORDER BY id DESC
+                LIMIT 50
+            """)
+            jobs = [format_backtest_job(row) for row in cursor.fetchall()]
+        return jsonify({'jobs': jobs, 'total': len(jobs)})
+    except Exception as e:
+        import traceback
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+@app.route('/api/admin/backtests/<int:job_id>', methods=['GET'])
+@admin_required
+def get_backtest_job(admin_id, job_id):
+    """Status, progress and (once DONE) result of a backtest job"""
+    try:
+        with get_db() as cursor:
+            cursor.execute(f"""
+                SELECT {BACKTEST_JOB_FIELDS}, result, ({BACKTEST_JOB_EXPIRED}) AS expired
+                FROM backtest_jobs WHERE id = %s
+            """, (job_id,))
+            job = cursor.fetchone()
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        # Picks up jobs left queued, or left running, by a worker that went away
+        if job.pop('expired') or job['status'] == 'QUEUED':
+            backtest_executor.submit(run_queued_backtest_jobs)
+        return jsonify({'job': format_backtest_job(job)})
     except Exception as e:
         import traceback
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
@@ -1907,6 +2636,8 @@ def get_admin_stats(admin_id):
             cursor.execute('SELECT COUNT(DISTINCT sector_name) as count FROM sectors')
             total_sectors = cursor.fetchone()['count']
             
+            snapshot = market_store.get()
+            
             return jsonify({
                 'stats': {
                     'total_users': total_users,
@@ -1914,7 +2645,13 @@ def get_admin_stats(admin_id):
                     'open_cycles': open_cycles,
                     'total_pnl': float(total_pnl),
                     'total_sectors': total_sectors
-                }
+                },
+                'market_data': {
+                    'rows': len(snapshot.frame),
+                    'symbols': len(snapshot.symbols),
+                    'loaded_at': snapshot.loaded_at.isoformat(),
+                    'conversion_report': snapshot.conversion_report
+                } if snapshot else None
             })
     except Exception as e:
         import traceback
@@ -1965,46 +2702,86 @@ def get_user_settings(user_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def scanner_cache_key(user_id, settings):
+    """Cache key covering every input of a scan: settings, data file and the user's cycles
+
+    The second part is the scan_snapshots key of the same inputs.
+    """
+    return (
+        settings_version(),
+        scan_snapshot_key(
+            user_id, settings, get_settings(), market_store.fingerprint(), get_cycles_version(user_id)
+        )
+    )
+
+def build_scanner_response(user_id, settings):
+    results = scan_all_symbols(
+        user_id,
+        settings.get('default_upper_threshold', 70),
+        settings.get('default_lower_threshold', 30),
+        settings.get('default_rsi_period', 14)
+    )
+    return scanner_response(results, settings, get_user_portfolio_summary(user_id))
+
+def scanner_response(results, settings, portfolio):
+    """/api/scanner body from a user's scan results and portfolio summary"""
+    rsi_period = settings.get('default_rsi_period', 14)
+    upper_threshold = settings.get('default_upper_threshold', 70)
+    lower_threshold = settings.get('default_lower_threshold', 30)
+    
+    total = len(results)
+    buy_signals = len([r for r in results if r['signal'] == 'BUY'])
+    sell_signals = len([r for r in results if r['signal'] == 'SELL'])
+    hold_signals = len([r for r in results if r['signal'] == 'HOLD'])
+    neutral_signals = len([r for r in results if r['signal'] == 'NEUTRAL'])
+    open_positions = len([r for r in results if r['has_open_cycle']])
+    
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'symbols': results,
+        'summary': {
+            'total_symbols': total,
+            'buy_signals': buy_signals,
+            'sell_signals': sell_signals,
+            'hold_signals': hold_signals,
+            'neutral_signals': neutral_signals,
+            'open_positions': open_positions
+        },
+        'portfolio': portfolio,
+        'settings': {
+            'rsi_period': rsi_period,
+            'upper_threshold': upper_threshold,
+            'lower_threshold': lower_threshold,
+            'sell_turnover_threshold': settings.get('sell_turnover_threshold', 12)
+        }
+    }
+
 @app.route('/api/scanner', methods=['GET'])
 @token_required
 def market_scanner(user_id):
+    """Latest scan for the user - read-only
+
+    Served from the EOD pipeline's snapshot while it matches the current
+    settings, data and cycles; otherwise scanned on the fly (without storing
+    TSL moves - that is the pipeline's job).
+    """
     try:
         settings = get_settings(user_id)
-        rsi_period = settings.get('default_rsi_period', 14)
-        upper_threshold = settings.get('default_upper_threshold', 70)
-        lower_threshold = settings.get('default_lower_threshold', 30)
-        
-        results = scan_all_symbols(user_id, upper_threshold, lower_threshold, rsi_period)
-        
-        total = len(results)
-        buy_signals = len([r for r in results if r['signal'] == 'BUY'])
-        sell_signals = len([r for r in results if r['signal'] == 'SELL'])
-        hold_signals = len([r for r in results if r['signal'] == 'HOLD'])
-        neutral_signals = len([r for r in results if r['signal'] == 'NEUTRAL'])
-        open_positions = len([r for r in results if r['has_open_cycle']])
-        
-        # Get portfolio summary
-        portfolio = get_user_portfolio_summary(user_id)
-        
-        return jsonify({
-            'timestamp': datetime.now().isoformat(),
-            'symbols': results,
-            'summary': {
-                'total_symbols': total,
-                'buy_signals': buy_signals,
-                'sell_signals': sell_signals,
-                'hold_signals': hold_signals,
-                'neutral_signals': neutral_signals,
-                'open_positions': open_positions
-            },
-            'portfolio': portfolio,
-            'settings': {
-                'rsi_period': rsi_period,
-                'upper_threshold': upper_threshold,
-                'lower_threshold': lower_threshold,
-                'sell_turnover_threshold': settings.get('sell_turnover_threshold', 12)
-            }
-        })
+        key = scanner_cache_key(user_id, settings)
+        body = scanner_cache.get(key)
+        cache_status = 'HIT'
+        
+        if body is None:
+            body = load_scan_snapshot(user_id, key[1])
+            cache_status = 'SNAPSHOT'
+            if body is None:
+                cache_status = 'MISS'
+                body = app.json.dumps(build_scanner_response(user_id, settings)).encode('utf-8')
+            scanner_cache.put(key, body)
+        
+        response = app.response_class(body, mimetype='application/json')
+        response.headers['X-Cache'] = cache_status
+        return response
     except Exception as e:
         import traceback
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
@@ -2012,14 +2789,10 @@ def market_scanner(user_id):
 @app.route('/api/symbols', methods=['GET'])
 def get_symbols():
     try:
-        if not os.path.exists(DATA_FILE):
+        snapshot = market_store.get()
+        if snapshot is None:
             return jsonify({'error': 'Data file not found'}), 404
-        df = pd.read_csv(DATA_FILE)
-        df['Symbol'] = df['Symbol'].astype(str).str.strip()
-        df = df[df['Symbol'].notna()]
-        df = df[df['Symbol'] != 'nan']
-        df = df[df['Symbol'] != '']
-        symbols = sorted(df['Symbol'].unique().tolist())
+        symbols = sorted(snapshot.symbols)
         return jsonify({'symbols': symbols, 'total': len(symbols)})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -2040,56 +2813,40 @@ def analyze_data(user_id):
         
         if not symbol:
             return jsonify({'error': 'Symbol is required'}), 400
-        if not os.path.exists(DATA_FILE):
+        max_points = data.get('max_points')
+        if max_points is not None:
+            try:
+                max_points = int(max_points)
+            except (TypeError, ValueError):
+                max_points = 0
+            if max_points < 3:
+                return jsonify({'error': 'max_points must be an integer of at least 3'}), 400
+        df = get_market_data()
+        if df is None:
             return jsonify({'error': 'Data file not found'}), 404
         
-        df = pd.read_csv(DATA_FILE)
-        df = df[df['Symbol'] == symbol].copy()
+        df = df[df['Symbol'] == symbol].reset_index(drop=True)
         if df.empty:
             return jsonify({'error': f'No data found for symbol {symbol}'}), 404
         if len(df) < rsi_period + 1:
             return jsonify({'error': f'Not enough data for {symbol}'}), 400
         
-        df['Date'] = pd.to_datetime(df['Date'], format='%d/%m/%Y', errors='coerce')
-        df = df.dropna(subset=['Date'])
-        df = df.sort_values('Date').reset_index(drop=True)
-        if df.empty:
-            return jsonify({'error': f'Invalid date data for symbol {symbol}'}), 400
-        
-        for col in ['Open', 'High', 'Low', 'Close']:
-            df[col] = df[col].apply(clean_numeric_value)
         df['RSI'] = calculate_rsi(df['Close'], period=rsi_period)
         
-        signals = []
-        for i in range(1, len(df)):
-            prev_rsi = df['RSI'].iloc[i-1]
-            curr_rsi = df['RSI'].iloc[i]
-            if pd.isna(prev_rsi) or pd.isna(curr_rsi):
-                continue
-            if prev_rsi <= upper_threshold and curr_rsi > upper_threshold:
-                signals.append({
-                    'date': df['Date'].iloc[i].strftime('%Y-%m-%d'),
-                    'type': 'BUY',
-                    'price': float(df['Close'].iloc[i]),
-                    'rsi': float(curr_rsi),
-                    'message': f'RSI crossed above {upper_threshold}'
-                })
-            elif prev_rsi >= lower_threshold and curr_rsi < lower_threshold:
-                signals.append({
-                    'date': df['Date'].iloc[i].strftime('%Y-%m-%d'),
-                    'type': 'SELL',
-                    'price': float(df['Close'].iloc[i]),
-                    'rsi': float(curr_rsi),
-                    'message': f'RSI crossed below {lower_threshold}'
-                })
+        dates = df['Date'].dt.strftime('%Y-%m-%d').to_numpy()
+        closes = df['Close'].to_numpy()
+        rsi_values = df['RSI'].to_numpy()
+        signals = crossover_signals(dates, closes, rsi_values, upper_threshold, lower_threshold)
         
-        chart_data = []
-        for _, row in df.iterrows():
-            chart_data.append({
-                'date': row['Date'].strftime('%Y-%m-%d'),
-                'close': float(row['Close']),
-                'rsi': float(row['RSI']) if not pd.isna(row['RSI']) else None
-            })
+        # Downsample long histories to max_points, keeping signal points ahead of the rest
+        points = np.arange(len(df))
+        if max_points:
+            buy, sell = crossover_masks(rsi_values, upper_threshold, lower_threshold)
+            points = lttb_indices([closes, rsi_values], max_points, keep=np.flatnonzero(buy | sell))
+        
+        # "columnar" returns chart = {dates: [], close: [], rsi: []} instead of chart_data records
+        columnar = data.get('format') == 'columnar'
+        chart = chart_payload(dates[points], closes[points], rsi_values[points], columnar=columnar)
         
         latest_rsi = float(df['RSI'].iloc[-1]) if not pd.isna(df['RSI'].iloc[-1]) else None
         latest_signal = None
@@ -2107,7 +2864,7 @@ def analyze_data(user_id):
         return jsonify({
             'symbol': symbol,
             'sector_info': sector_info,
-            'chart_data': chart_data,
+            ('chart' if columnar else 'chart_data'): chart,
             'signals': signals,
             'latest_signal': latest_signal,
             'statistics': {
@@ -2117,6 +2874,8 @@ def analyze_data(user_id):
                 'current_rsi': latest_rsi,
                 'avg_rsi': float(df['RSI'].mean()) if not df['RSI'].isna().all() else None,
                 'current_price': float(df['Close'].iloc[-1]),
+                'chart_points': len(points),
+                'total_points': len(df),
                 'date_range': {
                     'start': df['Date'].min().strftime('%Y-%m-%d'),
                     'end': df['Date'].max().strftime('%Y-%m-%d')
@@ -2133,34 +2892,101 @@ def analyze_data(user_id):
         import traceback
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
 
+# Columns of trade_cycles that /api/cycles can return (fields= projection)
+CYCLE_FIELDS = (
+    'id', 'user_id', 'symbol', 'sector', 'cycle_number', 'status',
+    'buy_date', 'buy_price', 'buy_rsi', 'sell_date', 'sell_price', 'sell_rsi',
+    'highest_price_after_buy', 'tsl_trigger_price', 'profit_loss', 'profit_loss_percent',
+    'sell_reason', 'created_at', 'updated_at'
+)
+CYCLES_DEFAULT_LIMIT = 50
+CYCLES_MAX_LIMIT = 500
+
+def encode_cycle_cursor(cycle):
+    return f"{cycle['buy_date'].isoformat()}_{cycle['id']}"
+
+def decode_cycle_cursor(value):
+    buy_date, cycle_id = value.split('_')
+    return datetime.strptime(buy_date, '%Y-%m-%d').date(), int(cycle_id)
+
+def parse_cycle_query(args, user_id, symbol=None):
+    """Build the trade_cycles query for /api/cycles from the request arguments
+
+    Pagination (newest buy_date first, keyset cursor on (buy_date, id)) is used
+    when limit or cursor is given; otherwise every matching cycle is returned
+    in the original order. Raises ValueError for invalid arguments.
+    Returns (sql, params, limit or None).
+    """
+    fields = [f.strip() for f in args.get('fields', '').split(',') if f.strip()]
+    unknown = [f for f in fields if f not in CYCLE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    
+    conditions = ['user_id = %s']
+    params = [user_id]
+    if symbol:
+        conditions.append('symbol = %s')
+        params.append(symbol)
+    if args.get('status'):
+        status = args['status'].upper()
+        if status not in ('OPEN', 'CLOSED'):
+            raise ValueError('status must be OPEN or CLOSED')
+        conditions.append('status = %s')
+        params.append(status)
+    if args.get('sector'):
+        conditions.append('sector = %s')
+        params.append(args['sector'])
+    if args.get('from'):
+        conditions.append('buy_date >= %s')
+        params.append(datetime.strptime(args['from'], '%Y-%m-%d').date())
+    if args.get('to'):
+        conditions.append('buy_date <= %s')
+        params.append(datetime.strptime(args['to'], '%Y-%m-%d').date())
+    
+    limit = None
+    if 'limit' in args or 'cursor' in args:
+        limit = min(max(int(args.get('limit', CYCLES_DEFAULT_LIMIT)), 1), CYCLES_MAX_LIMIT)
+        if args.get('cursor'):
+            conditions.append('(buy_date, id) < (%s, %s)')
+            params.extend(decode_cycle_cursor(args['cursor']))
+        # The cursor is built from these two columns
+        for key in ('buy_date', 'id'):
+            if fields and key not in fields:
+                fields.append(key)
+        order = 'buy_date DESC, id DESC LIMIT %s'
+        params.append(limit + 1)
+    elif symbol:
+        order = 'cycle_number DESC'
+    else:
+        order = 'sector, symbol, cycle_number DESC'
+    
+    sql = f"SELECT {', '.join(fields) or '*'} FROM trade_cycles WHERE {' AND '.join(conditions)} ORDER BY {order}"
+    return sql, params, limit
+
 @app.route('/api/cycles', methods=['GET'])
 @app.route('/api/cycles/<symbol>', methods=['GET'])
 @token_required
 def get_cycles(user_id, symbol=None):
     try:
+        try:
+            sql, params, limit = parse_cycle_query(request.args, user_id, symbol)
+        except ValueError as e:
+            return jsonify({'error': f'Invalid query: {e}'}), 400
+        
         with get_db() as cursor:
-            if symbol:
-                cursor.execute('''
-                    SELECT * FROM trade_cycles 
-                    WHERE user_id = %s AND symbol = %s
-                    ORDER BY cycle_number DESC
-                ''', (user_id, symbol))
-            else:
-                cursor.execute('''
-                    SELECT * FROM trade_cycles 
-                    WHERE user_id = %s
-                    ORDER BY sector, symbol, cycle_number DESC
-                ''', (user_id,))
-            cycles = []
-            for row in cursor.fetchall():
-                cycle = dict(row)
-                for key, value in cycle.items():
-                    if hasattr(value, '__float__'):
-                        cycle[key] = float(value)
-                    elif isinstance(value, datetime):
-                        cycle[key] = value.isoformat() if value.year > 1 else None
-                cycles.append(cycle)
-            return jsonify({'cycles': cycles, 'total': len(cycles)})
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        
+        response = {}
+        if limit is not None:
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            response['has_more'] = has_more
+            response['next_cursor'] = encode_cycle_cursor(rows[-1]) if has_more else None
+        
+        # Rows go out as they are - the JSON provider encodes DECIMAL and dates
+        response.update({'cycles': rows, 'total': len(rows)})
+        return jsonify(response)
     except Exception as e:
         import traceback
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
@@ -2178,45 +3004,49 @@ def execute_trade(user_id):
         
         if not all([symbol, action, date, price, rsi]):
             return jsonify({'error': 'Missing required fields'}), 400
+        if action not in ('BUY', 'SELL'):
+            return jsonify({'error': 'Invalid action'}), 400
         
-        if action == 'BUY':
-            open_cycle = get_open_cycle(user_id, symbol)
-            if open_cycle:
-                return jsonify({'error': f'Cycle {open_cycle["cycle_number"]} is still open'}), 400
-            
-            # Check sector limit
-            can_buy, message = can_buy_in_sector(user_id, symbol)
-            if not can_buy:
-                return jsonify({'error': message}), 400
+        # The whole trade is one transaction on one connection
+        with get_db() as cursor:
+            lock_user_cycles(user_id, cursor)
+            open_cycle = get_open_cycle(user_id, symbol, cursor)
             
-            # Check turnover eligibility
-            if not check_turnover_eligibility(symbol, date):
-                settings = get_settings(user_id)
-                top_n = settings.get('top_turnover_count', 15)
-                days = settings.get('top_turnover_days', 2)
+            if action == 'BUY':
+                if open_cycle:
+                    return jsonify({'error': f'Cycle {open_cycle["cycle_number"]} is still open'}), 400
+                
+                # Check sector limit
+                can_buy, message = can_buy_in_sector(user_id, symbol, cursor)
+                if not can_buy:
+                    return jsonify({'error': message}), 400
+                
+                # Check turnover eligibility
+                if not check_turnover_eligibility(symbol, date):
+                    settings = get_settings(user_id)
+                    top_n = settings.get('top_turnover_count', 15)
+                    days = settings.get('top_turnover_days', 2)
+                    return jsonify({
+                        'error': f'{symbol} is not in top {top_n} turnover for {days} consecutive days'
+                    }), 400
+                
+                cycle_number = create_buy_cycle(user_id, symbol, date, price, rsi, cursor)
+                sector_info = get_sector_info(symbol, cursor)
+                
                 return jsonify({
-                    'error': f'{symbol} is not in top {top_n} turnover for {days} consecutive days'
-                }), 400
-            
-            cycle_number = create_buy_cycle(user_id, symbol, date, price, rsi)
-            sector_info = get_sector_info(symbol)
-            
-            return jsonify({
-                'success': True,
-                'action': 'BUY',
-                'cycle_number': cycle_number,
-                'sector': sector_info['sector'] if sector_info else 'Unknown',
-                'message': f'Opened Cycle {cycle_number} for {symbol}'
-            })
+                    'success': True,
+                    'action': 'BUY',
+                    'cycle_number': cycle_number,
+                    'sector': sector_info['sector'] if sector_info else 'Unknown',
+                    'message': f'Opened Cycle {cycle_number} for {symbol}'
+                })
             
-        elif action == 'SELL':
-            open_cycle = get_open_cycle(user_id, symbol)
             if not open_cycle:
                 return jsonify({'error': 'No open cycle to close'}), 400
             
             sell_reason = 'AUTOMATIC'
             profit_loss, profit_loss_percent = close_cycle(
-                open_cycle['id'], date, price, rsi, sell_reason
+                open_cycle['id'], date, price, rsi, sell_reason, cursor
             )
             
             return jsonify({
@@ -2228,8 +3058,6 @@ def execute_trade(user_id):
                 'profit_loss_percent': round(profit_loss_percent, 2),
                 'message': f'Closed Cycle {open_cycle["cycle_number"]} - Automatic sell'
             })
-        else:
-            return jsonify({'error': 'Invalid action'}), 400
     except Exception as e:
         import traceback
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
@@ -2250,13 +3078,15 @@ def manual_sell(user_id):
         if not all([symbol, date, price, rsi]):
             return jsonify({'error': 'Missing required fields'}), 400
         
-        open_cycle = get_open_cycle(user_id, symbol)
-        if not open_cycle:
-            return jsonify({'error': 'No open cycle to close'}), 400
-        
-        profit_loss, profit_loss_percent = close_cycle(
-            open_cycle['id'], date, price, rsi, f'MANUAL: {reason}'
-        )
+        with get_db() as cursor:
+            lock_user_cycles(user_id, cursor)
+            open_cycle = get_open_cycle(user_id, symbol, cursor)
+            if not open_cycle:
+                return jsonify({'error': 'No open cycle to close'}), 400
+            
+            profit_loss, profit_loss_percent = close_cycle(
+                open_cycle['id'], date, price, rsi, f'MANUAL: {reason}', cursor
+            )
         
         return jsonify({
             'success': True,
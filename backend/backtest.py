@@ -0,0 +1,313 @@
+"""
+Backtest of the live RSI + trailing stop + turnover strategy.
+
+Replays the market data day by day and applies, to every symbol at once with
+array operations, the rules scan_all_symbols / execute_trade apply live:
+
+- SELL an open cycle when RSI < lower threshold, close < trailing stop, or
+  turnover rank > sell_turnover_threshold (reason in that priority);
+  otherwise raise the trailing stop on a new high.
+- BUY when RSI > upper threshold, the symbol ranked within top_turnover_count
+  on each of the last top_turnover_days trading days and the total / sector
+  limits allow it. Candidates are taken in scan (symbol) order and, as in a
+  live scan, positions sold the same day still count against the limits.
+
+Every signal is assumed to be executed at that day's close, and a symbol is
+only evaluated on days it traded. The equity curve treats the portfolio as
+max_total_positions equal slots, one per open position.
+
+    python backtest.py [path/to/data.csv] [--period 14] [--upper 70] ...
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from market_data import load_market_data
+from rsi import panel_rsi
+from turnover import TurnoverRanks
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# Same keys and defaults as global_settings
+DEFAULT_SETTINGS = {
+    'default_rsi_period': 14,
+    'default_upper_threshold': 70,
+    'default_lower_threshold': 30,
+    'top_turnover_count': 15,
+    'top_turnover_days': 2,
+    'sell_turnover_threshold': 12,
+    'tsl_percentage': 5,
+    'max_total_positions': 10,
+}
+
+
+def load_sector_map(path):
+    """{symbol: {'sector', 'max_positions'}} from Sectors&Symbols.csv, like PortfolioState.sectors"""
+    raw = pd.read_csv(path, dtype=str)
+    max_positions = pd.to_numeric(raw['max_positions'], errors='coerce').fillna(3).astype(int)
+    return {
+        symbol.strip(): {'sector': sector.strip(), 'max_positions': int(limit)}
+        for symbol, sector, limit in zip(raw['Symbol'], raw['Sector_name'], max_positions)
+        if isinstance(symbol, str) and isinstance(sector, str)
+    }
+
+
+class MarketArrays:
+    """Date x symbol matrices of the market data - everything a backtest reads
+
+    close:  closing price (NaN where the symbol did not trade)
+    traded: True where the symbol has a row for the date
+    rank:   turnover rank on the date (NaN where it did not trade)
+    """
+
+    def __init__(self, dates, symbols, close, traded, rank):
+        self.dates = pd.DatetimeIndex(dates)
+        self.symbols = list(symbols)
+        self.close = close
+        self.traded = traded
+        self.rank = rank
+
+    @classmethod
+    def from_frame(cls, frame):
+        ranks = TurnoverRanks(frame)
+        date_codes = ranks.dates.get_indexer(frame['Date'])
+        symbol_codes = frame['Symbol'].cat.codes.to_numpy()
+
+        close = np.full(ranks.matrix.shape, np.nan)
+        close[date_codes, symbol_codes] = frame['Close'].to_numpy(dtype='float64')
+        traded = np.zeros(ranks.matrix.shape, dtype=bool)
+        traded[date_codes, symbol_codes] = True
+        return cls(ranks.dates, ranks.symbols, close, traded, ranks.matrix)
+
+    def rsi(self, period):
+        """RSI matrix - each symbol's Wilder RSI over its own trading days
+
+        NaN until a symbol has period + 1 closes, the first day the scanner
+        (RsiState / latest_rsi) has an RSI for it.
+        """
+        d, s = np.nonzero(self.traded)  # row-major, so in date order
+        values, *_ = panel_rsi(s, self.close[d, s], len(self.symbols), period)
+        rsi = np.full(self.close.shape, np.nan)
+        rsi[d, s] = values
+        rsi[np.cumsum(self.traded, axis=0) < period + 1] = np.nan
+        return rsi
+
+    def eligible(self, top_n, days):
+        """True where the symbol ranked within top_n on the date and the days - 1 dates before it"""
+        days = max(int(days), 1)
+        inside = np.cumsum(self.rank <= top_n, axis=0)  # NaN (did not trade) counts as outside
+        window = inside.copy()
+        window[days:] -= inside[:-days]
+        return window >= days
+
+
+class BacktestResult:
+    """Trade cycles, equity curve and statistics of one backtest run"""
+
+    def __init__(self, settings, cycles, equity, runtime):
+        self.settings = settings
+        self.cycles = cycles
+        self.equity = equity
+        self.runtime = runtime
+
+    def sector_stats(self):
+        """Closed-trade statistics per sector"""
+        closed = self.cycles[self.cycles['status'] == 'CLOSED']
+        if closed.empty:
+            return pd.DataFrame(columns=['sector', 'trades', 'win_rate', 'avg_pnl_percent', 'total_pnl_percent'])
+        return closed.groupby('sector').agg(
+            trades=('profit_loss_percent', 'size'),
+            win_rate=('profit_loss_percent', lambda pnl: float((pnl > 0).mean())),
+            avg_pnl_percent=('profit_loss_percent', 'mean'),
+            total_pnl_percent=('profit_loss_percent', 'sum'),
+        ).reset_index().sort_values('total_pnl_percent', ascending=False, ignore_index=True)
+
+    def summary(self):
+        closed = self.cycles[self.cycles['status'] == 'CLOSED']
+        equity = self.equity['equity']
+        drawdown = (equity / equity.cummax() - 1).min() if len(equity) else 0.0
+        return {
+            'cycles': len(self.cycles),
+            'closed': len(closed),
+            'open': int((self.cycles['status'] == 'OPEN').sum()),
+            'win_rate': float((closed['profit_loss_percent'] > 0).mean()) if len(closed) else None,
+            'avg_pnl_percent': float(closed['profit_loss_percent'].mean()) if len(closed) else None,
+            'total_return_percent': float((equity.iloc[-1] - 1) * 100) if len(equity) else 0.0,
+            'max_drawdown_percent': float(drawdown * 100),
+            'runtime_seconds': round(self.runtime, 3),
+        }
+
+
+def run_backtest(market, settings=None, sectors=None, rsi=None):
+    """Replay the strategy over market (MarketArrays) with the given settings
+
+    settings: global_settings-style dict, missing keys use DEFAULT_SETTINGS.
+    sectors:  {symbol: {'sector', 'max_positions'}}; symbols without a sector
+              are never bought, as in the live system.
+    rsi:      precomputed market.rsi(period), to share between runs.
+    """
+    start = time.perf_counter()
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    period = int(settings['default_rsi_period'])
+    upper = settings['default_upper_threshold']
+    lower = settings['default_lower_threshold']
+    sell_threshold = settings['sell_turnover_threshold']
+    max_total = int(settings['max_total_positions'])
+    tsl_factor = 1 - settings['tsl_percentage'] / 100
+
+    rsi = market.rsi(period) if rsi is None else rsi
+    eligible = market.eligible(settings['top_turnover_count'], int(settings['top_turnover_days']))
+    close, traded, rank = market.close, market.traded, market.rank
+    n_dates, n_symbols = close.shape
+
+    sectors = sectors or {}
+    sector_names = sorted({info['sector'] for info in sectors.values()})
+    sector_index = {name: i for i, name in enumerate(sector_names)}
+    sector_code = np.array([sector_index[sectors[s]['sector']] if s in sectors else -1
+                            for s in market.symbols], dtype='int64')
+    symbol_max = np.array([sectors[s]['max_positions'] if s in sectors else 0
+                           for s in market.symbols], dtype='int64')
+    sector_positions = np.zeros(len(sector_names), dtype='int64')
+
+    is_open = np.zeros(n_symbols, dtype=bool)
+    buy_price = np.full(n_symbols, np.nan)
+    buy_rsi = np.full(n_symbols, np.nan)
+    highest = np.full(n_symbols, np.nan)
+    tsl = np.full(n_symbols, np.nan)
+    buy_day = np.full(n_symbols, -1, dtype='int64')
+    cycle_number = np.zeros(n_symbols, dtype='int64')
+    last_close = np.full(n_symbols, np.nan)
+
+    cycles = []
+    realized = 0.0
+    equity = np.empty(n_dates)
+    open_positions = np.empty(n_dates, dtype='int64')
+
+    def record(s, status, sell_day=None, sell_price=None, sell_rsi=None, reason=None):
+        profit_loss = None if sell_price is None else sell_price - buy_price[s]
+        cycles.append({
+            'symbol': market.symbols[s],
+            'sector': sector_names[sector_code[s]],
+            'cycle_number': int(cycle_number[s]),
+            'status': status,
+            'buy_date': market.dates[buy_day[s]].date(),
+            'buy_price': float(buy_price[s]),
+            'buy_rsi': float(buy_rsi[s]),
+            'sell_date': None if sell_day is None else market.dates[sell_day].date(),
+            'sell_price': sell_price,
+            'sell_rsi': sell_rsi,
+            'highest_price_after_buy': float(highest[s]),
+            'tsl_trigger_price': float(tsl[s]),
+            'profit_loss': profit_loss,
+            'profit_loss_percent': None if profit_loss is None else profit_loss / buy_price[s] * 100,
+            'sell_reason': reason,
+        })
+
+    for d in range(n_dates):
+        price = close[d]
+        today_rsi = rsi[d]
+        # The scanner skips symbols without an RSI value
+        active = traded[d] & ~np.isnan(today_rsi)
+        np.copyto(last_close, price, where=traded[d])
+
+        held = is_open & active
+        rsi_sell = held & (today_rsi < lower)
+        tsl_sell = held & (price < tsl)
+        turnover_sell = held & (rank[d] > sell_threshold)
+        sell = rsi_sell | tsl_sell | turnover_sell
+
+        new_high = held & ~sell & (price > highest)
+        highest[new_high] = price[new_high]
+        tsl[new_high] = price[new_high] * tsl_factor
+
+        # Limits count the positions open at the start of the day, like a live scan
+        candidates = np.flatnonzero(active & ~is_open & (today_rsi > upper) & eligible[d] & (sector_code >= 0))
+        buys = []
+        total = int(is_open.sum())
+        for s in candidates:
+            if total >= max_total:
+                break
+            if sector_positions[sector_code[s]] >= symbol_max[s]:
+                continue
+            total += 1
+            sector_positions[sector_code[s]] += 1
+            buys.append(s)
+
+        for s in np.flatnonzero(sell):
+            reason = 'RSI' if rsi_sell[s] else 'TSL' if tsl_sell[s] else 'TURNOVER'
+            record(s, 'CLOSED', d, float(price[s]), float(today_rsi[s]), reason)
+            realized += (price[s] - buy_price[s]) / buy_price[s] * 100
+            is_open[s] = False
+            sector_positions[sector_code[s]] -= 1
+
+        buys = np.asarray(buys, dtype='int64')
+        is_open[buys] = True
+        buy_price[buys] = price[buys]
+        buy_rsi[buys] = today_rsi[buys]
+        highest[buys] = price[buys]
+        tsl[buys] = price[buys] * tsl_factor
+        buy_day[buys] = d
+        cycle_number[buys] += 1
+
+        unrealized = float(np.nansum((last_close[is_open] - buy_price[is_open]) / buy_price[is_open]) * 100)
+        equity[d] = 1 + (realized + unrealized) / 100 / max_total
+        open_positions[d] = is_open.sum()
+
+    for s in np.flatnonzero(is_open):
+        record(s, 'OPEN')
+
+    cycles = pd.DataFrame(cycles, columns=[
+        'symbol', 'sector', 'cycle_number', 'status', 'buy_date', 'buy_price', 'buy_rsi',
+        'sell_date', 'sell_price', 'sell_rsi', 'highest_price_after_buy', 'tsl_trigger_price',
+        'profit_loss', 'profit_loss_percent', 'sell_reason'
+    ])
+    equity = pd.DataFrame({'date': market.dates, 'equity': equity, 'open_positions': open_positions})
+    return BacktestResult(settings, cycles, equity, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backtest the RSI + TSL + turnover strategy')
+    parser.add_argument('path', nargs='?', default=os.path.join(DATA_DIR, 'data_sample.csv'))
+    parser.add_argument('--sectors', default=os.path.join(DATA_DIR, 'Sectors&Symbols.csv'))
+    parser.add_argument('--period', type=int, default=DEFAULT_SETTINGS['default_rsi_period'])
+    parser.add_argument('--upper', type=float, default=DEFAULT_SETTINGS['default_upper_threshold'])
+    parser.add_argument('--lower', type=float, default=DEFAULT_SETTINGS['default_lower_threshold'])
+    parser.add_argument('--top-n', type=int, default=DEFAULT_SETTINGS['top_turnover_count'])
+    parser.add_argument('--top-days', type=int, default=DEFAULT_SETTINGS['top_turnover_days'])
+    parser.add_argument('--sell-rank', type=int, default=DEFAULT_SETTINGS['sell_turnover_threshold'])
+    parser.add_argument('--tsl', type=float, default=DEFAULT_SETTINGS['tsl_percentage'])
+    parser.add_argument('--max-total', type=int, default=DEFAULT_SETTINGS['max_total_positions'])
+    parser.add_argument('--output', help='write the trade cycles to this CSV')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    frame, _, _ = load_market_data(args.path)
+    market = MarketArrays.from_frame(frame)
+    print(f"📈 {len(market.dates)} days x {len(market.symbols)} symbols loaded in {time.perf_counter() - start:.2f}s")
+
+    result = run_backtest(market, {
+        'default_rsi_period': args.period,
+        'default_upper_threshold': args.upper,
+        'default_lower_threshold': args.lower,
+        'top_turnover_count': args.top_n,
+        'top_turnover_days': args.top_days,
+        'sell_turnover_threshold': args.sell_rank,
+        'tsl_percentage': args.tsl,
+        'max_total_positions': args.max_total,
+    }, load_sector_map(args.sectors))
+
+    for key, value in result.summary().items():
+        print(f"  • {key}: {value}")
+    print("\n📊 Sectors:")
+    print(result.sector_stats().to_string(index=False))
+    if args.output:
+        result.cycles.to_csv(args.output, index=False)
+        print(f"\n✅ Trade cycles written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Chart payload for /api/analyze - RSI crossover signals and the price/RSI
+series of one symbol, built from whole arrays instead of per-row loops.
+
+Long histories can be downsampled to max_points with LTTB (largest triangle
+three buckets), which keeps the visual shape of the series while always
+keeping the points where signals fired.
+"""
+
+import numpy as np
+
+
+def crossover_masks(rsi, upper_threshold, lower_threshold):
+    """Rows where RSI crossed above upper_threshold (BUY) and below lower_threshold (SELL)
+
+    Compares each RSI with the previous one; rows next to a NaN never signal.
+    A row that qualifies for both is a BUY, as in the original loop.
+    """
+    rsi = np.asarray(rsi, dtype='float64')
+    prev = np.concatenate([[np.nan], rsi[:-1]])
+    valid = ~np.isnan(prev) & ~np.isnan(rsi)
+    buy = valid & (prev <= upper_threshold) & (rsi > upper_threshold)
+    sell = valid & ~buy & (prev >= lower_threshold) & (rsi < lower_threshold)
+    return buy, sell
+
+
+def crossover_signals(dates, closes, rsi, upper_threshold, lower_threshold):
+    """Signal records for every crossover, in date order
+
+    dates: 'YYYY-MM-DD' strings; closes and rsi: float arrays of the same length.
+    """
+    buy, sell = crossover_masks(rsi, upper_threshold, lower_threshold)
+    signals = []
+    for i in np.nonzero(buy | sell)[0]:
+        signals.append({
+            'date': dates[i],
+            'type': 'BUY' if buy[i] else 'SELL',
+            'price': float(closes[i]),
+            'rsi': float(rsi[i]),
+            'message': f'RSI crossed above {upper_threshold}' if buy[i] else f'RSI crossed below {lower_threshold}'
+        })
+    return signals
+
+
+def lttb_indices(series, max_points, keep=None):
+    """Indices of at most max_points (>= 2) rows: first/last, then keep, then LTTB
+
+    series: equal-length arrays plotted together (e.g. close and RSI); each is
+    scaled to [0, 1] so all of them count when picking a bucket's point.
+    keep:   indices to keep ahead of LTTB's picks (signal points); when there
+    are more than max_points - 2 of them, an evenly spaced subset is kept.
+    Returns sorted unique indices.
+    """
+    values = np.column_stack([np.asarray(s, dtype='float64') for s in series])
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+    keep = np.setdiff1d(np.asarray([] if keep is None else keep, dtype='int64'), [0, n - 1])
+    budget = max_points - len(keep)
+    if budget < 3:
+        keep = keep[np.linspace(0, len(keep) - 1, max_points - 2).round().astype('int64')]
+        return np.union1d(keep, [0, n - 1])
+
+    with np.errstate(invalid='ignore'):
+        low = np.nanmin(values, axis=0)
+        span = np.nanmax(values, axis=0) - low
+    span = np.where(np.isnan(span) | (span == 0), 1.0, span)
+    y = np.nan_to_num((values - low) / span)
+    x = np.arange(n, dtype='float64')
+
+    # budget - 2 buckets between the first and last point
+    edges = np.linspace(1, n - 1, budget - 1).astype('int64')
+    selected = [0]
+    a = 0
+    for b in range(budget - 2):
+        start, end = edges[b], edges[b + 1]
+        if b + 2 < len(edges):
+            next_x = x[edges[b + 1]:edges[b + 2]].mean()
+            next_y = y[edges[b + 1]:edges[b + 2]].mean(axis=0)
+        else:
+            next_x, next_y = x[n - 1], y[n - 1]
+        # Area of the triangle (selected point, candidate, next bucket's mean), summed over series
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end])[:, None] * (next_y - y[a])).sum(axis=1)
+        a = start + int(np.argmax(area))
+        selected.append(a)
+    selected.append(n - 1)
+    return np.union1d(selected, keep)
+
+
+def _nullable(values):
+    return [None if v != v else v for v in np.asarray(values, dtype='float64').tolist()]
+
+
+def chart_payload(dates, closes, rsi, columnar=False):
+    """Price/RSI series as records [{date, close, rsi}] or columns {dates, close, rsi}
+
+    Missing RSI values (the warm-up period) are None.
+    """
+    dates = list(dates)
+    closes = np.asarray(closes, dtype='float64').tolist()
+    rsi = _nullable(rsi)
+    if columnar:
+        return {'dates': dates, 'close': closes, 'rsi': rsi}
+    return [{'date': d, 'close': c, 'rsi': r} for d, c, r in zip(dates, closes, rsi)]
@@ -340,6 +340,7 @@ PORTFOLIO LIMITS:
 import psycopg2
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 import os
+from datetime import date
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -380,6 +381,14 @@ def create_database():
         print(f"❌ Error creating database: {e}")
         return False
 
+def create_price_partitions(cursor, years):
+    """Create the yearly daily_prices partitions that do not exist yet"""
+    for year in sorted({int(y) for y in years}):
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS daily_prices_{year} PARTITION OF daily_prices
+            FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')
+        ''')
+
 def create_tables():
     """Create all required tables"""
     try:
@@ -398,9 +407,13 @@ def create_tables():
                 is_admin BOOLEAN DEFAULT FALSE,
                 is_active BOOLEAN DEFAULT TRUE,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_login TIMESTAMP
+                last_login TIMESTAMP,
+                cycles_version BIGINT NOT NULL DEFAULT 0
             )
         ''')
+        # Bumped with every change to the user's trade cycles (scan cache keys);
+        # added separately for databases created before the column existed
+        cursor.execute('ALTER TABLE users ADD COLUMN IF NOT EXISTS cycles_version BIGINT NOT NULL DEFAULT 0')
         print("✅ Users table created")
         
         # 2. Sectors table
@@ -485,6 +498,90 @@ def create_tables():
         ''')
         print("✅ Global settings table created")
         
+        # 7. RSI state table (Wilder averages per symbol and period, so the
+        #    latest RSI is one read and the next day is one update)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS rsi_state (
+                period INTEGER NOT NULL,
+                symbol VARCHAR(50) NOT NULL,
+                as_of_date DATE NOT NULL,
+                avg_gain DOUBLE PRECISION,
+                avg_loss DOUBLE PRECISION,
+                last_close DOUBLE PRECISION,
+                n_obs INTEGER NOT NULL,
+                sum_gain DOUBLE PRECISION NOT NULL DEFAULT 0,
+                sum_loss DOUBLE PRECISION NOT NULL DEFAULT 0,
+                data_version VARCHAR(50),
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (period, symbol)
+            )
+        ''')
+        # Market data version the state was computed from (app.data_version);
+        # added separately for databases created before the column existed
+        cursor.execute('ALTER TABLE rsi_state ADD COLUMN IF NOT EXISTS data_version VARCHAR(50)')
+        print("✅ RSI state table created")
+        
+        # 8. Daily prices table (OHLCV per symbol and day, one partition per
+        #    year - uploaddata.py creates partitions for new years on load)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS daily_prices (
+                symbol VARCHAR(50) NOT NULL,
+                date DATE NOT NULL,
+                open DECIMAL(15, 4),
+                high DECIMAL(15, 4),
+                low DECIMAL(15, 4),
+                close DECIMAL(15, 4),
+                percent_change DECIMAL(8, 4),
+                volume DECIMAL(20, 2),
+                turnover DECIMAL(20, 2),
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (symbol, date)
+            ) PARTITION BY RANGE (date)
+        ''')
+        create_price_partitions(cursor, range(2020, date.today().year + 2))
+        print("✅ Daily prices table created")
+        
+        # 9. Backtest jobs table (queue and result cache of /api/admin/backtests;
+        #    workers claim QUEUED rows with FOR UPDATE SKIP LOCKED)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS backtest_jobs (
+                id SERIAL PRIMARY KEY,
+                kind VARCHAR(20) NOT NULL,
+                params JSONB NOT NULL,
+                params_hash VARCHAR(64) NOT NULL,
+                data_version VARCHAR(50) NOT NULL,
+                status VARCHAR(20) NOT NULL DEFAULT 'QUEUED',
+                progress REAL NOT NULL DEFAULT 0,
+                result JSONB,
+                error TEXT,
+                created_by INTEGER REFERENCES users(id) ON DELETE SET NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                started_at TIMESTAMP,
+                heartbeat_at TIMESTAMP,
+                finished_at TIMESTAMP
+            )
+        ''')
+        # Lease columns (RUNNING jobs whose heartbeat stops are requeued);
+        # added separately for databases created before they existed
+        cursor.execute('ALTER TABLE backtest_jobs ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0')
+        cursor.execute('ALTER TABLE backtest_jobs ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP')
+        print("✅ Backtest jobs table created")
+        
+        # 10. Scan snapshots table (each user's latest /api/scanner body, written
+        #     by the EOD pipeline; scan_key hashes the inputs it was built from)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS scan_snapshots (
+                user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+                scan_key VARCHAR(64) NOT NULL,
+                data_version VARCHAR(50) NOT NULL,
+                as_of_date DATE NOT NULL,
+                payload JSONB NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        print("✅ Scan snapshots table created")
+        
         # Insert default global settings
         cursor.execute('''
             INSERT INTO global_settings (key, value, description) 
@@ -516,8 +613,13 @@ def create_tables():
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_trade_cycles_sector ON trade_cycles(sector)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_trade_cycles_user_symbol ON trade_cycles(user_id, symbol)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_trade_cycles_user_status ON trade_cycles(user_id, status)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_price_tracking_cycle_id ON price_tracking(cycle_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_trade_cycles_user_buy_date ON trade_cycles(user_id, buy_date DESC, id DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_price_tracking_cycle_date ON price_tracking(cycle_id, date)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_settings_user_id ON user_settings(user_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_daily_prices_date ON daily_prices(date)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_backtest_jobs_lookup ON backtest_jobs(params_hash, data_version)')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_backtest_jobs_queued ON backtest_jobs(id) WHERE status = 'QUEUED'")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_backtest_jobs_running ON backtest_jobs(id) WHERE status = 'RUNNING'")
         
         print("✅ Indexes created")
         
@@ -629,6 +731,10 @@ def drop_all_tables():
         cursor.execute('DROP TABLE IF EXISTS sectors CASCADE')
         cursor.execute('DROP TABLE IF EXISTS user_settings CASCADE')
         cursor.execute('DROP TABLE IF EXISTS global_settings CASCADE')
+        cursor.execute('DROP TABLE IF EXISTS rsi_state CASCADE')
+        cursor.execute('DROP TABLE IF EXISTS daily_prices CASCADE')
+        cursor.execute('DROP TABLE IF EXISTS backtest_jobs CASCADE')
+        cursor.execute('DROP TABLE IF EXISTS scan_snapshots CASCADE')
         cursor.execute('DROP TABLE IF EXISTS users CASCADE')
         
         conn.commit()
@@ -0,0 +1,152 @@
+"""
+PostgreSQL connection pool for threaded Flask/gunicorn workers.
+
+Wraps psycopg2's ThreadedConnectionPool (SimpleConnectionPool is not
+thread-safe) and adds:
+- a bounded wait for a free connection instead of an immediate PoolError
+  when every connection is checked out,
+- a liveness check on checkout for connections that sat idle for a while,
+- counters for the admin metrics endpoint.
+
+`minconn` connections are opened up front; idle connections are kept up
+to `maxconn` (plain psycopg2 closes any returned above minconn, so every
+burst beyond it reconnects). Create the pool after gunicorn forks (the
+default without --preload).
+"""
+
+import threading
+import time
+
+import psycopg2
+from psycopg2 import pool
+
+
+class PoolTimeoutError(pool.PoolError):
+    """No connection became free within the acquire timeout"""
+
+
+class _KeepIdlePool(pool.ThreadedConnectionPool):
+    """ThreadedConnectionPool that keeps up to maxconn idle connections"""
+
+    def __init__(self, minconn, maxconn, *args, **kwargs):
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        # After the initial connections, minconn is only used by _putconn,
+        # which keeps a returned connection while fewer than minconn are idle
+        self.minconn = maxconn
+
+
+class ConnectionPool:
+    """Thread-safe pool with acquire timeout, health checks and metrics"""
+
+    def __init__(self, minconn, maxconn, acquire_timeout=10.0, health_check_after=30.0, **db_config):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.acquire_timeout = acquire_timeout
+        self.health_check_after = health_check_after
+        self._pool = _KeepIdlePool(minconn, maxconn, **db_config)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._last_used = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'in_use': 0,
+            'waiting': 0,
+            'checkouts': 0,
+            'timeouts': 0,
+            'discarded': 0,
+            'total_wait': 0.0,
+            'max_wait': 0.0,
+        }
+
+    def getconn(self):
+        """Check out a healthy connection, waiting up to acquire_timeout for one"""
+        start = time.monotonic()
+        with self._lock:
+            self._stats['waiting'] += 1
+        acquired = self._slots.acquire(timeout=self.acquire_timeout)
+        waited = time.monotonic() - start
+
+        with self._lock:
+            self._stats['waiting'] -= 1
+            self._stats['total_wait'] += waited
+            self._stats['max_wait'] = max(self._stats['max_wait'], waited)
+            if acquired:
+                self._stats['checkouts'] += 1
+                self._stats['in_use'] += 1
+            else:
+                self._stats['timeouts'] += 1
+
+        if not acquired:
+            raise PoolTimeoutError(f"No database connection available after {self.acquire_timeout}s")
+
+        try:
+            return self._checkout_healthy()
+        except Exception:
+            self._release_slot()
+            raise
+
+    def putconn(self, conn, close=False):
+        """Return a connection to the pool"""
+        try:
+            self._pool.putconn(conn, close=close or bool(conn.closed))
+            # The pool closes connections returned in a broken state
+            if conn.closed:
+                self._last_used.pop(id(conn), None)
+            else:
+                self._last_used[id(conn)] = time.monotonic()
+        finally:
+            self._release_slot()
+
+    def stats(self):
+        """Pool metrics for monitoring"""
+        with self._lock:
+            stats = dict(self._stats)
+        checkouts = stats['checkouts'] + stats['timeouts']
+        return {
+            'min_connections': self.minconn,
+            'max_connections': self.maxconn,
+            'in_use': stats['in_use'],
+            'idle': len(self._pool._pool),
+            'waiting': stats['waiting'],
+            'checkouts': stats['checkouts'],
+            'timeouts': stats['timeouts'],
+            'discarded': stats['discarded'],
+            'avg_wait_ms': round(stats['total_wait'] / checkouts * 1000, 3) if checkouts else 0.0,
+            'max_wait_ms': round(stats['max_wait'] * 1000, 3),
+        }
+
+    def closeall(self):
+        self._pool.closeall()
+
+    def _release_slot(self):
+        with self._lock:
+            self._stats['in_use'] -= 1
+        self._slots.release()
+
+    def _checkout_healthy(self):
+        # Every pooled connection may be dead after a database restart, so
+        # keep discarding until we get a live (or freshly opened) one. At most
+        # maxconn - 1 are idle while we hold a slot, so this reaches a fresh
+        # connection unless connections die as fast as we open them.
+        for _ in range(self.maxconn):
+            conn = self._pool.getconn()
+            if self._is_healthy(conn):
+                return conn
+            with self._lock:
+                self._stats['discarded'] += 1
+            self._last_used.pop(id(conn), None)
+            self._pool.putconn(conn, close=True)
+        raise pool.PoolError(f"No healthy database connection after discarding {self.maxconn}")
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn))
+        if last_used is None or time.monotonic() - last_used < self.health_check_after:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            conn.rollback()
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            return False
@@ -0,0 +1,158 @@
+"""
+JSON encoding for API responses.
+
+Installed as the Flask JSON provider (app.json), so jsonify() and every
+route get it without changes. Uses orjson when it is installed - it encodes
+the scanner and chart payloads several times faster than the json module -
+and falls back to the standard provider otherwise. Both produce the same
+output: sorted keys, Decimal -> float, date/datetime -> ISO 8601, NumPy
+scalars/arrays -> numbers/lists and NaN/infinity -> null, so routes can
+return database rows and pandas values without converting them field by
+field.
+
+Run this file directly to benchmark the two encoders:  python json_provider.py
+"""
+
+import json
+import math
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional speed-up, see requirements.txt
+    orjson = None
+
+
+def json_default(obj):
+    """Encode the types the json module / orjson do not handle themselves"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def finite(obj):
+    """obj with NaN/infinity floats replaced by None, as orjson encodes them"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [finite(value) for value in obj]
+    if obj is None or isinstance(obj, (str, int)):
+        return obj
+    return finite(json_default(obj))
+
+
+class StandardJSONProvider(DefaultJSONProvider):
+    """Flask's provider with ISO dates and NumPy support (used without orjson)
+
+    The json module writes NaN and infinity as bare NaN/Infinity, which is not
+    valid JSON; payloads holding them are re-encoded with those values as null.
+    """
+
+    @staticmethod
+    def default(obj):
+        return json_default(obj)
+
+    def dumps(self, obj, **kwargs):
+        kwargs.setdefault('allow_nan', False)
+        try:
+            return super().dumps(obj, **kwargs)
+        except ValueError as e:
+            if 'Out of range float' not in str(e):
+                raise
+            return super().dumps(finite(obj), **kwargs)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """orjson-backed provider with the same output as StandardJSONProvider"""
+
+    option = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+    def _option(self, indent=False):
+        return self.option | (orjson.OPT_INDENT_2 if indent else 0)
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=json_default, option=self._option(kwargs.get('indent'))).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=json_default, option=self._option(indent))
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+JSONProvider = OrjsonProvider if orjson else StandardJSONProvider
+
+
+def _sample_payloads(symbols=300, cycles=5000):
+    """Scanner- and cycles-shaped payloads with the value types routes return"""
+    today = date.today()
+    scanner = {
+        'timestamp': datetime.now(),
+        'symbols': [{
+            'symbol': f"SYM{i}",
+            'sector': 'Commercial Bank',
+            'current_price': np.float64(400 + i * 0.37),
+            'current_rsi': round(30 + i % 50 + 0.123, 2),
+            'signal': 'HOLD',
+            'date': today.isoformat(),
+            'turnover_rank': i % 40 + 1,
+            'has_open_cycle': i % 3 == 0,
+            'sell_reason': None,
+        } for i in range(symbols)],
+    }
+    history = {'cycles': [{
+        'id': i,
+        'symbol': f"SYM{i % symbols}",
+        'status': 'CLOSED',
+        'buy_date': today - timedelta(days=i % 365),
+        'buy_price': Decimal('412.5000'),
+        'sell_price': Decimal('433.1000'),
+        'profit_loss_percent': Decimal('4.9939'),
+        'created_at': datetime.now(),
+    } for i in range(cycles)]}
+    return {'scanner': scanner, 'cycles': history}
+
+
+def _benchmark(repeat=20):
+    from flask import Flask
+
+    app = Flask(__name__)
+    providers = {'json': StandardJSONProvider(app)}
+    if orjson:
+        providers['orjson'] = OrjsonProvider(app)
+    else:
+        print("ℹ️  orjson is not installed - only the standard encoder is measured")
+
+    for name, payload in _sample_payloads().items():
+        timings = {}
+        for label, provider in providers.items():
+            start = time.perf_counter()
+            for _ in range(repeat):
+                encoded = provider.dumps(payload)
+            timings[label] = (time.perf_counter() - start) / repeat * 1000
+        line = ', '.join(f"{label} {ms:.2f}ms" for label, ms in timings.items())
+        if 'orjson' in timings:
+            line += f" ({timings['json'] / timings['orjson']:.1f}x)"
+        print(f"📦 {name}: {len(encoded) / 1024:.0f} KB | {line}")
+        if orjson:
+            assert json.loads(providers['json'].dumps(payload)) == orjson.loads(providers['orjson'].dumps(payload))
+
+
+if __name__ == '__main__':
+    _benchmark()
@@ -0,0 +1,500 @@
+"""
+Market data store - loads DATA_FILE once per process and shares the cleaned,
+typed frame across all routes. The file is only re-parsed when its mtime or
+size changes, and a reload swaps in a new snapshot atomically so requests in
+flight keep the frame they started with.
+
+MarketDataStore also writes the cleaned frame to a binary cache next to the
+CSV (one .npy file per column plus meta.json), which later loads - other
+gunicorn workers, restarts - read instead of parsing the CSV again. Other
+callers of load_market_data only read an existing cache unless they pass
+write_cache=True. Build it ahead of time with:
+python market_data.py [path/to/data.csv]
+and compare the memory each worker adds with a parsed vs a mapped frame with:
+python market_data.py memory [path/to/data.csv] [workers]
+
+New trading days can be appended without a full reload (append_day, or
+python market_data.py append day.csv [path/to/data.csv]).
+
+Cached columns are memory-mapped read-only rather than read into each
+process, so every gunicorn worker shares the same page-cache pages and
+resident memory stays flat as workers are added. Cache files are only ever
+replaced (never rewritten in place), so existing mappings stay valid.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+NUMERIC_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Vol', 'Turnover']
+
+# Bump when the cached layout or the cleaning rules change
+CACHE_VERSION = 1
+
+
+def clean_numeric_column(series):
+    """Vectorized clean_numeric_value for a whole column
+
+    Strips the thousands separators of Indian-style numbers ("2,31,87,242.90")
+    in one pass. Returns (float64 values, mask of cells that were present but
+    could not be parsed - those become NaN).
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype('float64'), pd.Series(False, index=series.index)
+
+    text = series.astype(str).str.replace(',', '', regex=False).str.strip()
+    values = pd.to_numeric(text, errors='coerce').astype('float64')
+    invalid = values.isna() & series.notna() & (text != '')
+    return values, invalid
+
+
+def clean_numeric_columns(df, columns=NUMERIC_COLUMNS):
+    """Convert the comma formatted numeric columns of df in place
+
+    Returns a conversion report {column: {'invalid': count, 'examples': [...]}}
+    listing only the columns that had unparseable cells.
+    """
+    report = {}
+    for col in columns:
+        if col not in df.columns:
+            continue
+        values, invalid = clean_numeric_column(df[col])
+        if invalid.any():
+            bad = df.loc[invalid, ['Symbol', col]].head(5)
+            report[col] = {
+                'invalid': int(invalid.sum()),
+                'examples': [{'row': int(idx), 'symbol': str(row['Symbol']), 'value': str(row[col])}
+                             for idx, row in bad.iterrows()]
+            }
+        df[col] = values
+    return report
+
+
+def load_market_frame(path):
+    """Read the data CSV into typed columns, sorted by date
+
+    Symbol -> categorical (categories in first-appearance order),
+    Date -> datetime64, OHLC/Vol/Turnover -> float64.
+    Returns (frame, conversion report).
+    """
+    df = pd.read_csv(path, dtype={'Symbol': str, 'Date': str})
+    df['Symbol'] = df['Symbol'].astype(str).str.strip()
+    df = df[df['Symbol'].notna() & (df['Symbol'] != 'nan') & (df['Symbol'] != '')].copy()
+    df['Date'] = pd.to_datetime(df['Date'], format='%d/%m/%Y', errors='coerce')
+    df = df.dropna(subset=['Date'])
+
+    report = clean_numeric_columns(df)
+
+    symbols = pd.unique(df['Symbol'])
+    df['Symbol'] = pd.Categorical(df['Symbol'], categories=symbols)
+    df = df.sort_values('Date', kind='mergesort').reset_index(drop=True)
+    return df, report
+
+
+def file_fingerprint(path):
+    """Return (mtime_ns, size) of path, or None if it is missing"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def cache_dir(path):
+    """Directory of the binary cache for the CSV at path"""
+    return f"{path}.cache-v{CACHE_VERSION}"
+
+
+def write_binary_cache(path, frame, report, source_fingerprint):
+    """Write a cleaned frame as a column set of .npy files next to path
+
+    meta.json is removed first and written last, so a reader never sees a
+    meta file describing columns that are not completely written.
+    """
+    directory = cache_dir(path)
+    os.makedirs(directory, exist_ok=True)
+    meta_path = os.path.join(directory, 'meta.json')
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    def save(name, values):
+        tmp = os.path.join(directory, f"{name}.tmp.npy")
+        np.save(tmp, values, allow_pickle=False)
+        os.replace(tmp, os.path.join(directory, f"{name}.npy"))
+
+    columns = []
+    for i, col in enumerate(frame.columns):
+        name = f"col{i}"
+        series = frame[col]
+        if col == 'Symbol':
+            kind = 'category'
+            save(name, series.cat.codes.to_numpy())
+            save(f"{name}.categories", series.cat.categories.to_numpy(dtype=str))
+        elif pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_dtype(series):
+            kind = 'array'
+            save(name, series.to_numpy())
+        else:
+            kind = 'str'
+            save(name, series.astype(str).to_numpy(dtype=str))
+        columns.append({'name': col, 'file': name, 'kind': kind})
+
+    meta = {
+        'version': CACHE_VERSION,
+        'source': list(source_fingerprint),
+        'rows': len(frame),
+        'columns': columns,
+        'conversion_report': report,
+    }
+    tmp = f"{meta_path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp, meta_path)
+
+
+def try_write_binary_cache(path, frame, report, source_fingerprint):
+    """write_binary_cache, logging instead of raising - the cache is only an optimisation"""
+    try:
+        write_binary_cache(path, frame, report, source_fingerprint)
+        return True
+    except Exception as e:
+        print(f"⚠️  Could not write market data cache: {e}")
+        return False
+
+
+def read_binary_cache(path, source_fingerprint):
+    """Load the cached frame for path, or None if there is no cache for this exact CSV
+
+    Numeric and date columns are read-only memory maps of the cache files.
+    """
+    directory = cache_dir(path)
+    try:
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != CACHE_VERSION or tuple(meta.get('source', ())) != tuple(source_fingerprint):
+        return None
+
+    try:
+        data = {}
+        for column in meta['columns']:
+            values = np.load(os.path.join(directory, f"{column['file']}.npy"), mmap_mode='r', allow_pickle=False)
+            if column['kind'] == 'category':
+                categories = np.load(os.path.join(directory, f"{column['file']}.categories.npy"), allow_pickle=False)
+                values = pd.Categorical.from_codes(values, categories=categories.astype(object))
+            elif column['kind'] == 'str':
+                values = values.astype(object)
+                values[values == 'nan'] = np.nan
+            if len(values) != meta['rows']:
+                # Columns of a rewrite in progress - treat as a miss
+                return None
+            data[column['name']] = values
+    except (OSError, ValueError, KeyError):
+        return None
+    # copy=False keeps each column its own block backed by the mapping
+    return pd.DataFrame(data, copy=False), meta.get('conversion_report', {})
+
+
+def load_market_data(path, use_cache=True, write_cache=False):
+    """load_market_frame, reading from the binary cache when possible
+
+    write_cache=True also (re)writes the cache after a CSV parse; a failed
+    write is logged and the parsed frame returned anyway.
+    Returns (frame, conversion report, source) where source is 'cache' or 'csv'.
+    """
+    fingerprint = file_fingerprint(path)
+    if use_cache and fingerprint is not None:
+        cached = read_binary_cache(path, fingerprint)
+        if cached is not None:
+            return cached[0], cached[1], 'cache'
+
+    frame, report = load_market_frame(path)
+    if use_cache and write_cache and fingerprint is not None:
+        try_write_binary_cache(path, frame, report, fingerprint)
+    return frame, report, 'csv'
+
+
+def append_csv_rows(path, day_path):
+    """Append the data rows of day_path to the CSV at path (headers must match)"""
+    with open(day_path, newline='') as f:
+        header = f.readline()
+        rows = f.read()
+    with open(path, newline='') as f:
+        existing = f.readline()
+    if header.strip().lstrip('\ufeff') != existing.strip().lstrip('\ufeff'):
+        raise ValueError(f"Column headers differ: {header.strip()!r} vs {existing.strip()!r}")
+
+    needs_newline = False
+    with open(path, 'rb') as f:
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b'\n'
+    with open(path, 'a', newline='') as f:
+        if needs_newline:
+            f.write('\n')
+        f.write(rows if rows.endswith('\n') else rows + '\n')
+
+
+def append_frame(frame, day):
+    """Frame with the (cleaned) rows of day appended, new symbols added as categories"""
+    known = set(frame['Symbol'].cat.categories)
+    categories = list(frame['Symbol'].cat.categories) + [s for s in day['Symbol'].astype(str) if s not in known]
+    old = frame.assign(Symbol=frame['Symbol'].cat.set_categories(categories))
+    new = day.assign(Symbol=pd.Categorical(day['Symbol'].astype(str), categories=categories))
+    return pd.concat([old, new[frame.columns]], ignore_index=True)
+
+
+def merge_reports(report, day_report, offset):
+    """Conversion report of the appended frame (day rows start at offset)"""
+    merged = dict(report)
+    for col, info in day_report.items():
+        examples = [dict(example, row=example['row'] + offset) for example in info['examples']]
+        previous = merged.get(col, {'invalid': 0, 'examples': []})
+        merged[col] = {
+            'invalid': previous['invalid'] + info['invalid'],
+            'examples': (previous['examples'] + examples)[:5]
+        }
+    return merged
+
+
+def process_memory():
+    """Resident memory of this process in kB from /proc/self/status (Linux only)
+
+    rss = anon (private to the process) + file (mapped files, shared through
+    the page cache) + shmem. pss (from smaps_rollup) divides every shared page
+    between the processes mapping it, so summing it over workers gives their
+    real combined footprint.
+    """
+    fields = {'VmRSS': 'rss_kb', 'RssAnon': 'anon_kb', 'RssFile': 'file_kb', 'RssShmem': 'shmem_kb'}
+    memory = {}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in fields:
+                    memory[fields[key]] = int(value.split()[0])
+    except OSError:
+        return None
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    memory['pss_kb'] = int(line.split()[1])
+    except OSError:
+        pass
+    return memory
+
+
+def _memory_worker(path, source, barrier, results):
+    """Load the frame from source ('csv' or 'cache'), report this process's added memory"""
+    before = process_memory()
+    frame, _, loaded_from = load_market_data(path, use_cache=(source == 'cache'))
+    assert loaded_from == source, f"expected a {source} load, got {loaded_from}"
+    # Touch every page, as a scan over all symbols does
+    frame.select_dtypes('number').sum()
+    frame['Date'].max()
+    # Measure while every worker holds its frame, so shared pages are shared
+    barrier.wait()
+    after = process_memory()
+    results.put({key: after[key] - before.get(key, 0) for key in after})
+    barrier.wait()
+
+
+def measure_worker_memory(path, workers=4):
+    """Memory each of workers processes adds by loading path: CSV-parsed vs mapped cache
+
+    Spawns fresh processes (like gunicorn workers) per source; all of them
+    hold their frame at the moment of measurement. Needs the cache to exist.
+    Returns {source: [per-worker deltas in kB]}.
+    """
+    import multiprocessing
+    context = multiprocessing.get_context('spawn')
+    measured = {}
+    for source in ('csv', 'cache'):
+        barrier = context.Barrier(workers)
+        results = context.Queue()
+        processes = [context.Process(target=_memory_worker, args=(path, source, barrier, results))
+                     for _ in range(workers)]
+        for process in processes:
+            process.start()
+        measured[source] = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    return measured
+
+
+class MarketSnapshot:
+    """One immutable load of the data file"""
+
+    def __init__(self, frame, fingerprint, conversion_report=None):
+        self.frame = frame
+        self.fingerprint = fingerprint
+        self.conversion_report = conversion_report or {}
+        self.symbols = list(frame['Symbol'].cat.categories)
+        self.loaded_at = datetime.now()
+        self._derived = {}
+        # Reentrant: builders may use other derived tables of the same snapshot
+        self._lock = threading.RLock()
+
+    def cached(self, key):
+        """Return a derived table if it has already been built (None otherwise)"""
+        return self._derived.get(key)
+
+    def derived_keys(self):
+        return list(self._derived)
+
+    def seed(self, key, value):
+        """Store a derived table computed elsewhere (e.g. stepped from a previous snapshot)"""
+        with self._lock:
+            self._derived[key] = value
+
+    def derived(self, key, builder):
+        """Return a table computed from this snapshot, building it only once
+
+        builder(snapshot) is called on first use; the result lives as long as
+        the snapshot, so a data reload invalidates every derived table at once.
+        """
+        value = self._derived.get(key)
+        if value is None:
+            with self._lock:
+                value = self._derived.get(key)
+                if value is None:
+                    value = builder(self)
+                    self._derived[key] = value
+        return value
+
+
+class MarketDataStore:
+    """Process-wide cache of the market data file, keyed on (mtime, size)
+
+    on_load(snapshot), if given, is called after each reload before the
+    snapshot is handed out, e.g. to seed derived tables saved elsewhere.
+    """
+
+    def __init__(self, path, on_load=None):
+        self.path = path
+        self.on_load = on_load
+        self._snapshot = None
+        # Reentrant so append_day can call get() while holding it
+        self._lock = threading.RLock()
+
+    def fingerprint(self):
+        """Return (mtime_ns, size) of the data file, or None if it is missing"""
+        return file_fingerprint(self.path)
+
+    def get(self):
+        """Return the current snapshot, reloading if the file changed (None if missing)"""
+        fingerprint = self.fingerprint()
+        if fingerprint is None:
+            return None
+
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.fingerprint == fingerprint:
+            return snapshot
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.fingerprint != fingerprint:
+                start = time.perf_counter()
+                frame, report, source = load_market_data(self.path, write_cache=True)
+                snapshot = MarketSnapshot(frame, fingerprint, report)
+                print(f"📈 Market data loaded from {source}: {len(frame)} rows, {len(snapshot.symbols)} symbols "
+                      f"in {(time.perf_counter() - start) * 1000:.0f}ms")
+                for col, info in report.items():
+                    print(f"⚠️  {col}: {info['invalid']} unparseable cells set to NaN, e.g. {info['examples'][:3]}")
+                if self.on_load is not None:
+                    self.on_load(snapshot)
+                self._snapshot = snapshot
+        return snapshot
+
+
+    def append_day(self, day_path, carry_forward=None):
+        """Append one trading day's CSV to the data file without a full reload
+
+        The day's rows are appended to the CSV and to the current frame and
+        the binary cache is rewritten for the other workers. carry_forward(old
+        snapshot, new snapshot, day frame), if given, seeds the new snapshot's
+        derived tables from the old ones so nothing is recomputed from the
+        first row. Raises ValueError unless day_path holds exactly one date
+        after the loaded data, with at most one row per symbol.
+        """
+        start = time.perf_counter()
+        day, day_report = load_market_frame(day_path)
+        if day.empty:
+            raise ValueError("No valid rows in the new day's file")
+        if day['Date'].nunique() != 1:
+            raise ValueError("The file must hold exactly one trading day")
+        if day['Symbol'].duplicated().any():
+            raise ValueError("The file has more than one row for a symbol")
+        date = day['Date'].iloc[0]
+
+        with self._lock:
+            snapshot = self.get()
+            if snapshot is None:
+                raise FileNotFoundError(self.path)
+            frame = snapshot.frame
+            if not frame.empty and date <= frame['Date'].iloc[-1]:
+                raise ValueError(f"{date:%d/%m/%Y} is not after the last loaded date "
+                                 f"{frame['Date'].iloc[-1]:%d/%m/%Y}")
+
+            append_csv_rows(self.path, day_path)
+            fingerprint = self.fingerprint()
+            report = merge_reports(snapshot.conversion_report, day_report, len(frame))
+            # The appended frame lives in process memory until the next reload
+            # maps it from the rewritten cache again
+            updated = MarketSnapshot(append_frame(frame, day), fingerprint, report)
+            if carry_forward is not None:
+                carry_forward(snapshot, updated, day)
+            self._snapshot = updated
+
+        print(f"📈 Appended {date:%d/%m/%Y}: {len(day)} rows in {(time.perf_counter() - start) * 1000:.0f}ms")
+        try_write_binary_cache(self.path, updated.frame, report, fingerprint)
+        return updated
+
+
+if __name__ == '__main__':
+    default = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'data_sample.csv')
+
+    if len(sys.argv) > 2 and sys.argv[1] == 'append':
+        store = MarketDataStore(sys.argv[3] if len(sys.argv) > 3 else default)
+        store.append_day(sys.argv[2])
+        sys.exit(0)
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'memory':
+        # python market_data.py memory [path/to/data.csv] [workers]
+        csv_path = sys.argv[2] if len(sys.argv) > 2 else default
+        workers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+        frame, report = load_market_frame(csv_path)
+        write_binary_cache(csv_path, frame, report, file_fingerprint(csv_path))
+        print(f"📊 Memory added per worker, {workers} workers, {len(frame)} rows "
+              f"({os.path.getsize(csv_path) / 1024:.0f} kB CSV):")
+        del frame
+        for source, deltas in measure_worker_memory(csv_path, workers).items():
+            for i, delta in enumerate(deltas):
+                print(f"  {source:5} worker {i}: rss {delta['rss_kb']:>7} kB  anon {delta['anon_kb']:>7} kB  "
+                      f"file {delta['file_kb']:>7} kB  pss {delta.get('pss_kb', 0):>7} kB")
+            print(f"  {source:5} total:    rss {sum(d['rss_kb'] for d in deltas):>7} kB  "
+                  f"anon {sum(d['anon_kb'] for d in deltas):>7} kB  "
+                  f"pss {sum(d.get('pss_kb', 0) for d in deltas):>7} kB")
+        sys.exit(0)
+
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else default
+
+    start = time.perf_counter()
+    fingerprint = file_fingerprint(csv_path)
+    frame, report = load_market_frame(csv_path)
+    write_binary_cache(csv_path, frame, report, fingerprint)
+    csv_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    frame, _, source = load_market_data(csv_path)
+    cache_ms = (time.perf_counter() - start) * 1000
+    print(f"✅ Cache written to {cache_dir(csv_path)}: {len(frame)} rows | "
+          f"CSV parse {csv_ms:.0f}ms, {source} load {cache_ms:.1f}ms")
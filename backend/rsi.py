@@ -0,0 +1,378 @@
+"""
+Wilder RSI engine
+
+Loop-free replacement for the original calculate_rsi. Wilder smoothing
+
+    avg[i] = (avg[i-1] * (period - 1) + x[i]) / period
+
+is an exponentially weighted mean with alpha = 1/period (adjust=False), so once
+the first average is seeded with the same rolling mean the old loop used,
+pandas' ewm yields the same series (to float rounding) without a Python loop.
+
+RsiState keeps the last averages of every symbol so a new trading day is one
+O(symbols) step of the recurrence instead of a recompute from the first row.
+
+Run this file directly to check the per-series, panel (all symbols at once)
+and stepped versions against the original implementation:  python rsi.py [path/to/data.csv]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from market_data import load_market_frame
+
+
+def _wilder_average(values, lead, period):
+    """Wilder-smoothed average of each column of a 2-D array
+
+    values: gap-free float array (rows = observations, columns = series).
+    lead:   per-column count of padding rows before the series starts.
+    The first average of a column is the plain mean of its first `period`
+    values; columns with fewer than period + 1 values are all NaN, matching
+    the original calculate_rsi.
+    """
+    n_rows, n_cols = values.shape
+    counts = n_rows - lead
+    result = np.full((n_rows, n_cols), np.nan)
+
+    cols = np.nonzero(counts >= period + 1)[0]
+    if len(cols) == 0:
+        return result
+
+    # Padding rows hold zeros, so the running sum at the seed row is the sum
+    # of the first `period` real values of each column.
+    seed_rows = lead[cols] + period - 1
+    seeds = np.cumsum(values[:, cols], axis=0)[seed_rows, np.arange(len(cols))] / period
+
+    rows = np.arange(n_rows)[:, None]
+    seeded = np.where(rows > seed_rows, values[:, cols], np.nan)
+    seeded[seed_rows, np.arange(len(cols))] = seeds
+
+    result[:, cols] = pd.DataFrame(seeded).ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+    return result
+
+
+def _gains_losses(delta):
+    # A missing difference (first close, or next to a missing close) counts as 0
+    return np.where(delta > 0, delta, 0.0), np.where(delta < 0, -delta, 0.0)
+
+
+def _rsi_from_averages(avg_gain, avg_loss):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / np.where(avg_loss == 0, np.nan, avg_loss)
+        return 100 - (100 / (1 + rs))
+
+
+def packed_averages(closes, lead, period=14):
+    """Gains, losses and their Wilder averages for each column of a 2-D close array"""
+    closes = np.asarray(closes, dtype='float64')
+    lead = np.asarray(lead, dtype='int64')
+
+    gains, losses = _gains_losses(np.diff(closes, axis=0, prepend=np.nan))
+    return gains, losses, _wilder_average(gains, lead, period), _wilder_average(losses, lead, period)
+
+
+def packed_rsi(closes, lead, period=14):
+    """RSI of each column of a 2-D close array
+
+    closes: float array, rows = observations in date order, columns = symbols.
+    lead:   per-column count of padding rows before that symbol's first close.
+    """
+    _, _, avg_gain, avg_loss = packed_averages(closes, lead, period)
+    return _rsi_from_averages(avg_gain, avg_loss)
+
+
+def wilder_rsi(prices, period=14):
+    """Wilder RSI of a price Series (drop-in for the original calculate_rsi)"""
+    values = prices.to_numpy(dtype='float64').reshape(-1, 1)
+    rsi = packed_rsi(values, np.zeros(1, dtype='int64'), period)
+    return pd.Series(rsi[:, 0], index=prices.index)
+
+
+def _pack(codes, n_symbols):
+    """Layout for packing a long, date-ordered dataset into a 2-D array
+
+    Each symbol gets a column holding its own rows in date order, right-aligned
+    so the last row of the array is every symbol's latest observation.
+    Returns (order, rows, sorted_codes, lead, counts): input row order[i] goes
+    to packed[rows[i], sorted_codes[i]].
+    """
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    counts = np.bincount(codes, minlength=n_symbols)
+    starts = np.cumsum(counts) - counts
+    lead = counts.max() - counts
+    rows = lead[sorted_codes] + np.arange(len(codes)) - starts[sorted_codes]
+    return order, rows, sorted_codes, lead, counts
+
+
+def panel_rsi(codes, closes, n_symbols, period=14):
+    """RSI of every symbol of a long dataset in one pass
+
+    codes:  integer symbol code per row (0 .. n_symbols - 1)
+    closes: close price per row; rows must be in date order.
+    Returns (rsi per input row, packed closes, packed RSI, order, counts).
+    """
+    codes = np.asarray(codes, dtype='int64')
+    closes = np.asarray(closes, dtype='float64')
+    order, rows, sorted_codes, lead, counts = _pack(codes, n_symbols)
+
+    packed = np.full((int(counts.max()), n_symbols), np.nan)
+    packed[rows, sorted_codes] = closes[order]
+    packed_values = packed_rsi(packed, lead, period)
+
+    rsi = np.empty(len(codes))
+    rsi[order] = packed_values[rows, sorted_codes]
+    return rsi, packed, packed_values, order, counts
+
+
+def latest_rsi(frame, period=14):
+    """Latest close, RSI and date of every symbol as one frame (index = symbol)
+
+    frame must be the market data frame: date-ordered, categorical Symbol.
+    Symbols with fewer than period + 1 rows get a NaN RSI.
+    """
+    symbols = frame['Symbol'].cat.categories
+    if frame.empty:
+        return pd.DataFrame({'close': [], 'rsi': [], 'date': pd.to_datetime([]), 'observations': []},
+                            index=pd.Index([], name='symbol'))
+
+    codes = frame['Symbol'].cat.codes.to_numpy()
+    _, packed, packed_values, order, counts = panel_rsi(codes, frame['Close'].to_numpy(), len(symbols), period)
+
+    # Last input row of each symbol (symbols without rows are dropped below)
+    last_row = order[np.maximum(np.cumsum(counts) - 1, 0)]
+    latest = pd.DataFrame({
+        'close': packed[-1],
+        'rsi': packed_values[-1],
+        'date': frame['Date'].to_numpy()[last_row],
+        'observations': counts,
+    }, index=pd.Index(symbols, name='symbol'))
+    return latest[counts > 0]
+
+
+class RsiState:
+    """Wilder RSI state of every symbol for one period
+
+    Enough to advance the RSI by a trading day without the price history:
+    avg_gain/avg_loss (NaN until `period` closes are seen), last_close,
+    n_obs and, for the warm-up, the running sums of gains/losses. Instances
+    are never modified - step() returns a new state.
+    """
+
+    def __init__(self, symbols, period, avg_gain, avg_loss, last_close, n_obs,
+                 sum_gain, sum_loss, last_date):
+        self.symbols = list(symbols)
+        self.period = period
+        self.avg_gain = avg_gain
+        self.avg_loss = avg_loss
+        self.last_close = last_close
+        self.n_obs = n_obs
+        self.sum_gain = sum_gain
+        self.sum_loss = sum_loss
+        self.last_date = last_date
+
+    @classmethod
+    def empty(cls, symbols, period=14):
+        n = len(symbols)
+        nan = np.full(n, np.nan)
+        return cls(symbols, period, nan, nan.copy(), nan.copy(), np.zeros(n, dtype='int64'),
+                   np.zeros(n), np.zeros(n), np.full(n, np.datetime64('NaT', 'ns')))
+
+    @classmethod
+    def from_frame(cls, frame, period=14):
+        """State after the last row of the market data frame (date-ordered, categorical Symbol)"""
+        symbols = list(frame['Symbol'].cat.categories)
+        if frame.empty:
+            return cls.empty(symbols, period)
+
+        codes = frame['Symbol'].cat.codes.to_numpy().astype('int64')
+        order, rows, sorted_codes, lead, counts = _pack(codes, len(symbols))
+        packed = np.full((int(counts.max()), len(symbols)), np.nan)
+        packed[rows, sorted_codes] = frame['Close'].to_numpy(dtype='float64')[order]
+        gains, losses, avg_gain, avg_loss = packed_averages(packed, lead, period)
+
+        # Padding rows hold zero gains, so column sums are the per-symbol sums.
+        # _wilder_average leaves symbols with exactly `period` closes NaN (their
+        # RSI is undefined), but their seed average already exists.
+        sum_gain, sum_loss = gains.sum(axis=0), losses.sum(axis=0)
+        seeded = counts == period
+        last_row = order[np.maximum(np.cumsum(counts) - 1, 0)]
+        last_date = np.where(counts > 0, frame['Date'].to_numpy()[last_row], np.datetime64('NaT', 'ns'))
+        return cls(
+            symbols, period,
+            np.where(seeded, sum_gain / period, avg_gain[-1]),
+            np.where(seeded, sum_loss / period, avg_loss[-1]),
+            packed[-1], counts.astype('int64'), sum_gain, sum_loss,
+            last_date.astype('datetime64[ns]')
+        )
+
+    @classmethod
+    def from_records(cls, symbols, period, records):
+        """State for symbols from rows of the rsi_state table (dicts); missing symbols start empty"""
+        state = cls.empty(symbols, period)
+        position = {symbol: i for i, symbol in enumerate(state.symbols)}
+        for row in records:
+            i = position.get(row['symbol'])
+            if i is None:
+                continue
+            state.avg_gain[i] = np.nan if row['avg_gain'] is None else row['avg_gain']
+            state.avg_loss[i] = np.nan if row['avg_loss'] is None else row['avg_loss']
+            state.last_close[i] = np.nan if row['last_close'] is None else row['last_close']
+            state.n_obs[i] = row['n_obs']
+            state.sum_gain[i] = row['sum_gain']
+            state.sum_loss[i] = row['sum_loss']
+            state.last_date[i] = np.datetime64(row['as_of_date'], 'ns')
+        return state
+
+    def records(self):
+        """Rows for the rsi_state table: (period, symbol, as_of_date, avg_gain,
+        avg_loss, last_close, n_obs, sum_gain, sum_loss), NaN as None"""
+        def value(x):
+            return None if np.isnan(x) else float(x)
+
+        for i in np.nonzero(self.n_obs > 0)[0]:
+            yield (
+                self.period, self.symbols[i], pd.Timestamp(self.last_date[i]).date(),
+                value(self.avg_gain[i]), value(self.avg_loss[i]), value(self.last_close[i]),
+                int(self.n_obs[i]), float(self.sum_gain[i]), float(self.sum_loss[i])
+            )
+
+    def step(self, day):
+        """State after one more trading day - O(symbols)
+
+        day: rows of a single date with Symbol, Close and Date (one row per
+        symbol). Symbols without a row keep their state; new symbols are added
+        after the existing ones, in the order they appear in day.
+        """
+        day_symbols = day['Symbol'].astype(str).to_numpy()
+        known = set(self.symbols)
+        symbols = self.symbols + [s for s in day_symbols if s not in known]
+        grow = len(symbols) - len(self.symbols)
+
+        def extend(values, fill):
+            return np.concatenate([values, np.full(grow, fill, dtype=values.dtype)])
+
+        avg_gain = extend(self.avg_gain, np.nan)
+        avg_loss = extend(self.avg_loss, np.nan)
+        last_close = extend(self.last_close, np.nan)
+        n_obs = extend(self.n_obs, 0)
+        sum_gain = extend(self.sum_gain, 0.0)
+        sum_loss = extend(self.sum_loss, 0.0)
+        last_date = extend(self.last_date, np.datetime64('NaT', 'ns'))
+
+        idx = pd.Index(symbols).get_indexer(day_symbols)
+        close = day['Close'].to_numpy(dtype='float64')
+        gain, loss = _gains_losses(close - last_close[idx])
+        count = n_obs[idx] + 1
+        period = self.period
+
+        sum_gain[idx] += gain
+        sum_loss[idx] += loss
+        seeded = count == period
+        smoothed = count > period
+        avg_gain[idx] = np.where(seeded, sum_gain[idx] / period,
+                                 np.where(smoothed, (avg_gain[idx] * (period - 1) + gain) / period, avg_gain[idx]))
+        avg_loss[idx] = np.where(seeded, sum_loss[idx] / period,
+                                 np.where(smoothed, (avg_loss[idx] * (period - 1) + loss) / period, avg_loss[idx]))
+        last_close[idx] = close
+        n_obs[idx] = count
+        last_date[idx] = day['Date'].to_numpy(dtype='datetime64[ns]')
+
+        return RsiState(symbols, period, avg_gain, avg_loss, last_close, n_obs, sum_gain, sum_loss, last_date)
+
+    def rsi(self):
+        """Current RSI per symbol (NaN with fewer than period + 1 closes, or no losses)"""
+        rsi = _rsi_from_averages(self.avg_gain, self.avg_loss)
+        return np.where(self.n_obs >= self.period + 1, rsi, np.nan)
+
+    def latest(self):
+        """Same frame as latest_rsi() for the data this state has seen"""
+        latest = pd.DataFrame({
+            'close': self.last_close,
+            'rsi': self.rsi(),
+            'date': self.last_date,
+            'observations': self.n_obs,
+        }, index=pd.Index(self.symbols, name='symbol'))
+        return latest[self.n_obs > 0]
+
+
+def _reference_rsi(prices, period=14):
+    """The original loop-based calculate_rsi, kept as the golden reference"""
+    if len(prices) < period + 1:
+        return pd.Series([np.nan] * len(prices), index=prices.index)
+    delta = prices.diff()
+    gains = delta.where(delta > 0, 0)
+    losses = -delta.where(delta < 0, 0)
+    avg_gain = gains.rolling(window=period, min_periods=period).mean()
+    avg_loss = losses.rolling(window=period, min_periods=period).mean()
+    avg_gain = avg_gain.copy()
+    avg_loss = avg_loss.copy()
+    if len(gains) > period:
+        for i in range(period, len(gains)):
+            if pd.notna(avg_gain.iloc[i-1]) and pd.notna(avg_loss.iloc[i-1]):
+                avg_gain.iloc[i] = (avg_gain.iloc[i-1] * (period - 1) + gains.iloc[i]) / period
+                avg_loss.iloc[i] = (avg_loss.iloc[i-1] * (period - 1) + losses.iloc[i]) / period
+    rs = avg_gain / avg_loss.replace(0, np.nan)
+    rsi = 100 - (100 / (1 + rs))
+    return rsi
+
+
+def _golden_check(path, periods=(9, 14, 21), tolerance=1e-9):
+    """Compare wilder_rsi with the reference loop for every symbol in path"""
+    df, _ = load_market_frame(path)
+    ok = True
+    for period in periods:
+        worst = 0.0
+        fast_time = slow_time = 0.0
+        start = time.perf_counter()
+        panel = latest_rsi(df, period)
+        panel_time = time.perf_counter() - start
+        for symbol, group in df.groupby('Symbol', observed=True, sort=False):
+            closes = group['Close'].reset_index(drop=True)
+            start = time.perf_counter()
+            expected = _reference_rsi(closes, period)
+            slow_time += time.perf_counter() - start
+            start = time.perf_counter()
+            actual = wilder_rsi(closes, period)
+            fast_time += time.perf_counter() - start
+
+            if not expected.isna().equals(actual.isna()):
+                print(f"❌ {symbol} (period {period}): NaN positions differ")
+                ok = False
+                continue
+            diff = (expected - actual).abs().max()
+            worst = max(worst, 0.0 if pd.isna(diff) else float(diff))
+
+            panel_value = panel.at[symbol, 'rsi']
+            if pd.isna(panel_value) != pd.isna(expected.iloc[-1]):
+                print(f"❌ {symbol} (period {period}): panel RSI NaN mismatch")
+                ok = False
+            elif not pd.isna(panel_value):
+                worst = max(worst, abs(float(panel_value) - float(expected.iloc[-1])))
+
+        # Replaying the last trading day through RsiState must give the panel result
+        last_date = df['Date'].iloc[-1]
+        stepped = RsiState.from_frame(df[df['Date'] < last_date], period).step(df[df['Date'] == last_date]).latest()
+        stepped_rsi = stepped['rsi'].reindex(panel.index)
+        if not stepped_rsi.isna().equals(panel['rsi'].isna()):
+            print(f"❌ period {period}: stepped RSI NaN positions differ from the panel")
+            ok = False
+        else:
+            step_diff = (stepped_rsi - panel['rsi']).abs().max()
+            worst = max(worst, 0.0 if pd.isna(step_diff) else float(step_diff))
+
+        status = '✅' if worst <= tolerance else '❌'
+        ok = ok and worst <= tolerance
+        print(f"{status} period {period}: max abs diff {worst:.2e} | loop {slow_time:.2f}s, "
+              f"per-symbol vectorized {fast_time:.2f}s, panel {panel_time:.3f}s")
+    return ok
+
+
+if __name__ == '__main__':
+    default = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'data_sample.csv')
+    sys.exit(0 if _golden_check(sys.argv[1] if len(sys.argv) > 1 else default) else 1)
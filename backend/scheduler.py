@@ -0,0 +1,59 @@
+"""
+End-of-day scheduler - runs the EOD pipeline (app.run_eod_pipeline) after each data load.
+
+Every EOD_CHECK_MINUTES it checks the market data file and runs the pipeline
+when the file changed since the last run; EOD_RUN_AT (HH:MM) adds a daily run
+as a catch-up. The pipeline is idempotent per day and takes a database lock,
+so running it from here and from the append endpoint at once is safe.
+
+Deploy it as one process next to the web server (wsgi.py does not start it):
+
+    python scheduler.py          # run forever
+    python scheduler.py --once   # run the pipeline once and exit
+"""
+
+import argparse
+import os
+import time
+
+import schedule
+
+from app import market_store, run_eod_pipeline_logged
+
+EOD_CHECK_MINUTES = int(os.getenv('EOD_CHECK_MINUTES', '5'))
+EOD_RUN_AT = os.getenv('EOD_RUN_AT', '18:30')
+
+_last_fingerprint = None
+
+
+def run_if_new_data():
+    """Run the pipeline when the data file changed since the last successful run"""
+    global _last_fingerprint
+    fingerprint = market_store.fingerprint()
+    if fingerprint is None or fingerprint == _last_fingerprint:
+        return
+    if run_eod_pipeline_logged() is not None:
+        _last_fingerprint = fingerprint
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the end-of-day scan and TSL pipeline on a schedule')
+    parser.add_argument('--once', action='store_true', help='run the pipeline once and exit')
+    args = parser.parse_args()
+
+    if args.once:
+        run_eod_pipeline_logged()
+        return
+
+    schedule.every(EOD_CHECK_MINUTES).minutes.do(run_if_new_data)
+    schedule.every().day.at(EOD_RUN_AT).do(run_eod_pipeline_logged)
+    print(f"⏰ EOD pipeline: data check every {EOD_CHECK_MINUTES} min, daily run at {EOD_RUN_AT}")
+
+    run_if_new_data()
+    while True:
+        schedule.run_pending()
+        time.sleep(1)
+
+
+if __name__ == '__main__':
+    main()
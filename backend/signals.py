@@ -0,0 +1,97 @@
+"""
+Market-wide scanner stage - everything about a symbol's signal that does not
+depend on the user: latest close/RSI/date, turnover rank, top-N eligibility
+and the turnover sell flag.
+
+The tables are memoized on the market snapshot, keyed by RSI period and the
+global turnover settings, so after a data update the heavy work runs once per
+distinct RSI period in use and every user's scan only adds the cheap overlay
+(thresholds, open cycles, sector limits) on top. When a day is appended to the
+data (MarketDataStore.append_day), carry_forward steps the rank table and RSI
+states instead of rebuilding them.
+"""
+
+import numpy as np
+import pandas as pd
+
+from rsi import RsiState
+from turnover import TurnoverRanks
+
+
+def turnover_ranks(snapshot):
+    """(date x symbol) turnover rank table of a snapshot"""
+    return snapshot.derived('turnover_ranks', lambda snap: TurnoverRanks(snap.frame))
+
+
+def rsi_state(snapshot, period):
+    """Wilder RSI state of every symbol at the end of a snapshot"""
+    return snapshot.derived(('rsi_state', period), lambda snap: RsiState.from_frame(snap.frame, period))
+
+
+def latest_rsi_table(snapshot, period):
+    """Latest close/RSI/date of every symbol of a snapshot (see rsi.latest_rsi)"""
+    return snapshot.derived(('latest_rsi', period), lambda snap: rsi_state(snap, period).latest())
+
+
+def turnover_key(global_settings):
+    """The global settings the market stage depends on"""
+    return (
+        global_settings.get('top_turnover_count', 15),
+        global_settings.get('top_turnover_days', 2),
+        global_settings.get('sell_turnover_threshold', 12),
+    )
+
+
+def build_market_signals(snapshot, rsi_period, top_n, days_required, sell_threshold):
+    """One record per symbol with a valid latest close and RSI, in symbol order
+
+    Symbols whose latest close did not parse (NaN) are skipped, like the old
+    per-symbol scan did. Records are shared between users and must not be modified.
+    """
+    latest = latest_rsi_table(snapshot, rsi_period)
+    latest = latest[latest['rsi'].notna() & np.isfinite(latest['close'])]
+    ranks = turnover_ranks(snapshot)
+
+    symbols = latest.index.to_numpy()
+    dates = pd.DatetimeIndex(latest['date'])
+    rank = ranks.ranks_at(symbols, dates)
+    eligible = ranks.top_n_mask(symbols, dates, top_n, days_required)
+    # A missing rank never triggers a turnover sell
+    sell = np.nan_to_num(rank, nan=0) > sell_threshold
+
+    return [
+        {
+            'symbol': symbol,
+            'close': float(close),
+            'rsi': float(rsi),
+            'date': date,
+            'turnover_rank': None if np.isnan(r) else int(r),
+            'turnover_eligible': bool(e),
+            'turnover_sell': bool(s),
+        }
+        for symbol, close, rsi, date, r, e, s in zip(
+            symbols, latest['close'], latest['rsi'], dates.strftime('%Y-%m-%d'), rank, eligible, sell
+        )
+    ]
+
+
+def market_signals(snapshot, rsi_period, global_settings):
+    """Memoized build_market_signals for the current global turnover settings"""
+    top_n, days_required, sell_threshold = turnover_key(global_settings)
+    return snapshot.derived(
+        ('market_signals', rsi_period, top_n, days_required, sell_threshold),
+        lambda snap: build_market_signals(snap, rsi_period, top_n, days_required, sell_threshold)
+    )
+
+
+def carry_forward(old, new, day):
+    """Seed new's rank table and RSI states by stepping old's by one day - O(symbols)
+
+    Only tables old already built are carried; the rest are built lazily.
+    """
+    ranks = old.cached('turnover_ranks')
+    if ranks is not None:
+        new.seed('turnover_ranks', ranks.append_day(day))
+    for key in old.derived_keys():
+        if isinstance(key, tuple) and key[0] == 'rsi_state':
+            new.seed(key, old.cached(key).step(day))
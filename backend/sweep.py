@@ -0,0 +1,183 @@
+"""
+Parameter sweep - backtests a grid of settings combinations in parallel.
+
+The market matrices are copied once into shared memory; each worker process
+attaches to them in its initializer, so tasks only carry a small settings
+dict instead of pickling the dataset per task. Workers also reuse the RSI
+matrix of each period they have already computed.
+
+    python sweep.py --period 9 14 21 --upper 65 70 75 --lower 25 30 --tsl 3 5 7 \
+        [--top-n 10 15] [--workers 8] [--output sweep_results.csv]
+
+--scaling 1 2 4 runs the same grid with each worker count and prints the
+speed-up over the first, to check how the sweep scales on a machine.
+"""
+
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from backtest import DATA_DIR, DEFAULT_SETTINGS, MarketArrays, load_sector_map, run_backtest
+from market_data import load_market_data
+
+# Settings a sweep can vary, with their CLI flags
+SWEEP_KEYS = {
+    'default_rsi_period': 'period',
+    'default_upper_threshold': 'upper',
+    'default_lower_threshold': 'lower',
+    'top_turnover_count': 'top_n',
+    'top_turnover_days': 'top_days',
+    'sell_turnover_threshold': 'sell_rank',
+    'tsl_percentage': 'tsl',
+}
+
+# Worker process state, set by _init_worker
+_market = None
+_sectors = None
+_blocks = []
+_rsi_cache = {}
+
+
+def settings_grid(**values):
+    """Every combination of the given setting values, e.g. settings_grid(default_rsi_period=[9, 14])
+
+    Sorted by RSI period so workers mostly reuse their RSI matrix.
+    """
+    keys = list(values)
+    grid = [dict(zip(keys, combo)) for combo in itertools.product(*(values[key] for key in keys))]
+    return sorted(grid, key=lambda settings: settings.get('default_rsi_period', DEFAULT_SETTINGS['default_rsi_period']))
+
+
+class SharedArrays:
+    """numpy arrays copied into named shared memory blocks"""
+
+    def __init__(self, arrays):
+        self.blocks = []
+        self.specs = {}
+        for name, array in arrays.items():
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            self.specs[name] = (block.name, array.shape, array.dtype.str)
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+
+
+def _attach(specs):
+    """Map the blocks described by SharedArrays.specs as read-only arrays
+
+    Child processes share the parent's resource tracker, so attaching here
+    doesn't make the blocks outlive (or die with) the worker; the parent
+    unlinks them in SharedArrays.close().
+    """
+    arrays, blocks = {}, []
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        array.flags.writeable = False
+        arrays[name] = array
+        blocks.append(block)
+    return arrays, blocks
+
+
+def _init_worker(specs, dates, symbols, sectors):
+    global _market, _sectors, _blocks
+    arrays, _blocks = _attach(specs)
+    _market = MarketArrays(dates, symbols, arrays['close'], arrays['traded'], arrays['rank'])
+    _sectors = sectors
+
+
+def _run_task(settings):
+    period = int(settings.get('default_rsi_period', DEFAULT_SETTINGS['default_rsi_period']))
+    if period not in _rsi_cache:
+        _rsi_cache[period] = _market.rsi(period)
+    result = run_backtest(_market, settings, _sectors, rsi=_rsi_cache[period])
+    return {**settings, **result.summary()}
+
+
+def run_sweep(market, grid, sectors=None, workers=None, progress=None, mp_context=None):
+    """Backtest every settings dict of grid; returns the results ranked by total return
+
+    progress(done, total) is called as tasks finish. Pass a 'spawn' mp_context
+    when calling from a multi-threaded process (e.g. a gunicorn worker).
+    """
+    shared = SharedArrays({'close': market.close, 'traded': market.traded, 'rank': market.rank})
+    rows = []
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(),
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(shared.specs, market.dates, market.symbols, sectors or {}),
+        ) as executor:
+            futures = [executor.submit(_run_task, settings) for settings in grid]
+            for future in as_completed(futures):
+                rows.append(future.result())
+                if progress:
+                    progress(len(rows), len(futures))
+    finally:
+        shared.close()
+
+    results = pd.DataFrame(rows)
+    if results.empty:
+        return results
+    results = results.sort_values(['total_return_percent', 'max_drawdown_percent'],
+                                  ascending=[False, False], ignore_index=True)
+    results.insert(0, 'rank', np.arange(1, len(results) + 1))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backtest a grid of settings in parallel')
+    parser.add_argument('path', nargs='?', default=os.path.join(DATA_DIR, 'data_sample.csv'))
+    parser.add_argument('--sectors', default=os.path.join(DATA_DIR, 'Sectors&Symbols.csv'))
+    for key, flag in SWEEP_KEYS.items():
+        parser.add_argument(f"--{flag.replace('_', '-')}", dest=flag, nargs='+', type=float,
+                            default=[float(DEFAULT_SETTINGS[key])])
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default='sweep_results.csv')
+    parser.add_argument('--scaling', type=int, nargs='+', metavar='WORKERS',
+                        help='time the grid with each worker count instead of writing results')
+    args = parser.parse_args()
+
+    frame, _, _ = load_market_data(args.path)
+    market = MarketArrays.from_frame(frame)
+    grid = settings_grid(**{
+        key: [int(v) if float(v).is_integer() else v for v in getattr(args, flag)]
+        for key, flag in SWEEP_KEYS.items()
+    })
+    print(f"🔁 {len(grid)} combinations over {len(market.dates)} days x {len(market.symbols)} symbols")
+    sectors = load_sector_map(args.sectors)
+
+    if args.scaling:
+        print(f"   {os.cpu_count()} CPUs")
+        baseline = None
+        for workers in args.scaling:
+            start = time.perf_counter()
+            run_sweep(market, grid, sectors, workers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"  {workers:>3} workers: {elapsed:6.2f}s  speed-up {baseline / elapsed:.2f}x")
+        return
+
+    start = time.perf_counter()
+    results = run_sweep(market, grid, sectors, args.workers,
+                        progress=lambda done, total: print(f"  {done}/{total}", end='\r'))
+    elapsed = time.perf_counter() - start
+
+    results.to_csv(args.output, index=False)
+    print(f"✅ {len(results)} results in {elapsed:.1f}s ({elapsed / max(len(results), 1):.2f}s each) -> {args.output}")
+    print(results.head(10).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# The backend modules import each other as top-level modules
+sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture
+def prices_csv(tmp_path):
+    """Copy of the fixture price CSV in a scratch directory (caches land there, not in the repo)"""
+    path = tmp_path / 'prices.csv'
+    shutil.copy(os.path.join(FIXTURES_DIR, 'prices.csv'), path)
+    return str(path)
+
+
+@pytest.fixture
+def sectors_csv():
+    return os.path.join(FIXTURES_DIR, 'sectors.csv')
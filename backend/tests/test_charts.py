@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from charts import chart_payload, crossover_masks, crossover_signals, lttb_indices
+
+NAN = np.nan
+
+
+def loop_signals(dates, closes, rsi, upper_threshold, lower_threshold):
+    """The per-row crossover loop analyze_data used before charts.py"""
+    signals = []
+    for i in range(1, len(rsi)):
+        prev_rsi, curr_rsi = rsi[i - 1], rsi[i]
+        if pd.isna(prev_rsi) or pd.isna(curr_rsi):
+            continue
+        if prev_rsi <= upper_threshold and curr_rsi > upper_threshold:
+            signals.append({'date': dates[i], 'type': 'BUY', 'price': float(closes[i]), 'rsi': float(curr_rsi),
+                            'message': f'RSI crossed above {upper_threshold}'})
+        elif prev_rsi >= lower_threshold and curr_rsi < lower_threshold:
+            signals.append({'date': dates[i], 'type': 'SELL', 'price': float(closes[i]), 'rsi': float(curr_rsi),
+                            'message': f'RSI crossed below {lower_threshold}'})
+    return signals
+
+
+def test_crossover_masks_on_hand_built_series():
+    rsi = [NAN, 65, 72, 75, 69, 71, 50, 31, 28, 25, 35, 29, NAN, 20, 70, 70.5, 30, 29.9]
+    buy, sell = crossover_masks(rsi, 70, 30)
+    # Crossing from exactly the threshold counts; landing on it does not
+    assert np.flatnonzero(buy).tolist() == [2, 5, 15]
+    assert np.flatnonzero(sell).tolist() == [8, 11, 17]
+
+
+@pytest.mark.parametrize('rsi', [[], [50], [NAN, NAN], [80, 90, 95]])
+def test_crossover_masks_without_crossings(rsi):
+    buy, sell = crossover_masks(rsi, 70, 30)
+    assert len(buy) == len(sell) == len(rsi)
+    assert not buy.any() and not sell.any()
+
+
+def test_crossover_signals_match_the_loop():
+    rng = np.random.default_rng(3)
+    rsi = rng.uniform(10, 90, 500)
+    rsi[:14] = NAN
+    rsi[rng.choice(500, 20, replace=False)] = NAN
+    closes = rng.uniform(100, 200, 500)
+    dates = [d.strftime('%Y-%m-%d') for d in pd.bdate_range('2024-01-01', periods=500)]
+    for upper, lower in [(70, 30), (60, 40), (55, 55)]:
+        signals = crossover_signals(dates, closes, rsi, upper, lower)
+        assert signals
+        assert signals == loop_signals(dates, closes, rsi, upper, lower)
+
+
+def test_chart_payload_records_and_columns():
+    dates = ['2024-01-01', '2024-01-02', '2024-01-03']
+    closes = np.array([10.0, 11.5, 12.0])
+    rsi = np.array([NAN, NAN, 61.25])
+    assert chart_payload(dates, closes, rsi) == [
+        {'date': '2024-01-01', 'close': 10.0, 'rsi': None},
+        {'date': '2024-01-02', 'close': 11.5, 'rsi': None},
+        {'date': '2024-01-03', 'close': 12.0, 'rsi': 61.25},
+    ]
+    assert chart_payload(dates, closes, rsi, columnar=True) == {
+        'dates': dates, 'close': [10.0, 11.5, 12.0], 'rsi': [None, None, 61.25],
+    }
+
+
+def price_series(n, seed=5):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.02, n))
+    rsi = rng.uniform(10, 90, n)
+    rsi[:14] = NAN
+    return close, rsi
+
+
+@pytest.mark.parametrize('n, max_points', [(1000, 100), (501, 500), (37, 10), (10000, 3)])
+def test_lttb_returns_max_points_including_first_and_last(n, max_points):
+    indices = lttb_indices(price_series(n), max_points)
+    assert len(indices) == max_points
+    assert indices[0] == 0 and indices[-1] == n - 1
+    assert (np.diff(indices) > 0).all()
+
+
+@pytest.mark.parametrize('n', [0, 1, 2, 100])
+def test_lttb_passes_short_series_through(n):
+    assert lttb_indices(price_series(n), 100).tolist() == list(range(n))
+
+
+def test_lttb_keeps_requested_points_within_budget():
+    close, rsi = price_series(2000)
+    keep = [5, 777, 1500, 1501]
+    indices = lttb_indices([close, rsi], 200, keep=keep)
+    assert set(keep) <= set(indices.tolist())
+    assert {0, 1999} <= set(indices.tolist())
+    assert len(indices) <= 200
+
+
+@pytest.mark.parametrize('max_points', [3, 10, 50])
+def test_lttb_never_returns_more_than_max_points(max_points):
+    close, rsi = price_series(1000)
+    keep = list(range(0, 1000, 7))
+    indices = lttb_indices([close, rsi], max_points, keep=keep)
+    assert len(indices) == max_points
+    assert indices[0] == 0 and indices[-1] == 999
+    assert set(indices[1:-1].tolist()) <= set(keep)
+
+
+def test_lttb_keeps_a_spike():
+    close = np.full(1000, 100.0)
+    close[613] = 150.0
+    assert 613 in lttb_indices([close], 50)
+
+
+def test_lttb_with_a_budget_too_small_for_buckets():
+    assert lttb_indices(price_series(100), 5, keep=[10, 20, 30]).tolist() == [0, 10, 20, 30, 99]
+    # More keep points than fit: evenly spaced ones, still at most max_points
+    assert lttb_indices(price_series(100), 4, keep=[10, 20, 30]).tolist() == [0, 10, 30, 99]
+    assert lttb_indices(price_series(100), 3, keep=[0, 10, 20, 30, 99]).tolist() == [0, 10, 99]
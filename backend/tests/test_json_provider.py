@@ -0,0 +1,64 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+flask = pytest.importorskip('flask')
+
+from json_provider import OrjsonProvider, StandardJSONProvider, orjson  # noqa: E402
+
+PAYLOAD = {
+    'price': np.float64(412.5),
+    'rsi': float('nan'),
+    'series': np.array([1.0, np.nan, np.inf]),
+    'rows': [{'pnl': Decimal('4.9939'), 'loss': Decimal('NaN'), 'high': -float('inf')}],
+    'date': date(2024, 1, 2),
+    'at': datetime(2024, 1, 2, 15, 30),
+    'count': np.int64(3),
+    'nested': ({'z': None, 'a': True},),
+}
+
+EXPECTED = {
+    'price': 412.5,
+    'rsi': None,
+    'series': [1.0, None, None],
+    'rows': [{'pnl': 4.9939, 'loss': None, 'high': None}],
+    'date': '2024-01-02',
+    'at': '2024-01-02T15:30:00',
+    'count': 3,
+    'nested': [{'z': None, 'a': True}],
+}
+
+
+def strict_loads(text):
+    """json.loads that rejects the NaN/Infinity extensions"""
+    def reject(constant):
+        raise ValueError(f"invalid JSON constant {constant}")
+    return json.loads(text, parse_constant=reject)
+
+
+@pytest.fixture
+def app():
+    return flask.Flask(__name__)
+
+
+def test_standard_provider_writes_nan_as_null(app):
+    assert strict_loads(StandardJSONProvider(app).dumps(PAYLOAD)) == EXPECTED
+
+
+def test_standard_provider_still_raises_other_value_errors(app):
+    loop = []
+    loop.append(loop)
+    with pytest.raises(ValueError, match='Circular reference'):
+        StandardJSONProvider(app).dumps(loop)
+
+
+@pytest.mark.skipif(orjson is None, reason='orjson is not installed')
+def test_providers_produce_the_same_output(app):
+    standard = StandardJSONProvider(app).dumps(PAYLOAD)
+    fast = OrjsonProvider(app).dumps(PAYLOAD)
+    assert strict_loads(fast) == strict_loads(standard) == EXPECTED
+    # Sorted keys in both
+    assert list(strict_loads(standard)) == list(strict_loads(fast)) == sorted(PAYLOAD)
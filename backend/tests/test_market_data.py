@@ -0,0 +1,48 @@
+import os
+
+from market_data import MarketDataStore, cache_dir, load_market_data
+
+
+def test_load_market_data_does_not_write_cache_by_default(prices_csv):
+    frame, _, source = load_market_data(prices_csv)
+    assert source == 'csv'
+    assert len(frame) > 0
+    assert not os.path.exists(cache_dir(prices_csv))
+
+
+def test_load_market_data_reads_cache_written_on_request(prices_csv):
+    frame, _, _ = load_market_data(prices_csv, write_cache=True)
+    assert os.path.exists(os.path.join(cache_dir(prices_csv), 'meta.json'))
+
+    cached, _, source = load_market_data(prices_csv)
+    assert source == 'cache'
+    assert cached['Close'].equals(frame['Close'])
+
+
+def test_cache_write_failure_is_not_fatal(prices_csv):
+    # A file where the cache directory should go makes the write fail
+    with open(cache_dir(prices_csv), 'w') as f:
+        f.write('')
+    frame, _, source = load_market_data(prices_csv, write_cache=True)
+    assert source == 'csv'
+    assert len(frame) > 0
+
+
+def test_store_writes_cache(prices_csv):
+    snapshot = MarketDataStore(prices_csv).get()
+    assert snapshot is not None
+    assert os.path.exists(os.path.join(cache_dir(prices_csv), 'meta.json'))
+
+
+def test_store_calls_on_load_once_per_reload(prices_csv):
+    loaded = []
+    store = MarketDataStore(prices_csv, on_load=loaded.append)
+    snapshot = store.get()
+    assert store.get() is snapshot
+    assert loaded == [snapshot]
+
+    # A changed file is a new load
+    with open(prices_csv, 'a') as f:
+        f.write('\n')
+    assert store.get() is not snapshot
+    assert len(loaded) == 2 and loaded[-1] is store.get()
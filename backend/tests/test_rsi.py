@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_data import load_market_frame
+from rsi import RsiState, _reference_rsi, latest_rsi, panel_rsi, wilder_rsi
+
+PERIODS = [9, 14, 21]
+TOLERANCE = 1e-9
+
+
+@pytest.fixture(scope='module')
+def frame():
+    from conftest import FIXTURES_DIR
+    df, _ = load_market_frame(f"{FIXTURES_DIR}/prices.csv")
+    return df
+
+
+def assert_same_rsi(actual, expected):
+    actual = np.asarray(actual, dtype='float64')
+    expected = np.asarray(expected, dtype='float64')
+    np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected))
+    np.testing.assert_allclose(actual[~np.isnan(actual)], expected[~np.isnan(expected)], rtol=0, atol=TOLERANCE)
+
+
+@pytest.mark.parametrize('period', PERIODS)
+def test_wilder_rsi_matches_reference(frame, period):
+    for _, group in frame.groupby('Symbol', observed=True, sort=False):
+        closes = group['Close'].reset_index(drop=True)
+        assert_same_rsi(wilder_rsi(closes, period), _reference_rsi(closes, period))
+
+
+@pytest.mark.parametrize('period', PERIODS)
+def test_panel_rsi_matches_reference(frame, period):
+    codes = frame['Symbol'].cat.codes.to_numpy()
+    rsi, *_ = panel_rsi(codes, frame['Close'].to_numpy(), len(frame['Symbol'].cat.categories), period)
+    for code, symbol in enumerate(frame['Symbol'].cat.categories):
+        rows = codes == code
+        closes = frame.loc[rows, 'Close'].reset_index(drop=True)
+        assert_same_rsi(rsi[rows], _reference_rsi(closes, period))
+
+
+@pytest.mark.parametrize('period', PERIODS)
+def test_latest_rsi_matches_reference(frame, period):
+    latest = latest_rsi(frame, period)
+    for symbol, group in frame.groupby('Symbol', observed=True, sort=False):
+        expected = _reference_rsi(group['Close'].reset_index(drop=True), period)
+        assert_same_rsi([latest.at[symbol, 'rsi']], [expected.iloc[-1]])
+        assert latest.at[symbol, 'close'] == group['Close'].iloc[-1]
+        assert latest.at[symbol, 'date'] == group['Date'].iloc[-1]
+
+
+@pytest.mark.parametrize('period', PERIODS)
+def test_stepping_each_day_matches_reference(frame, period):
+    dates = frame['Date'].unique()
+    split = len(dates) // 2
+    state = RsiState.from_frame(frame[frame['Date'] < dates[split]], period)
+    for date in dates[split:]:
+        state = state.step(frame[frame['Date'] == date])
+
+    latest = state.latest()
+    expected = latest_rsi(frame, period)
+    assert_same_rsi(latest['rsi'].reindex(expected.index), expected['rsi'])
+    np.testing.assert_array_equal(latest['observations'].reindex(expected.index), expected['observations'])
+
+
+def test_step_from_empty_state_matches_reference():
+    closes = pd.Series([10.0, 10.5, 10.2, 10.8, 11.0, 10.7, 10.9, 11.4, 11.1, 11.6])
+    period = 3
+    state = RsiState.empty(['AAA'], period)
+    for i, close in enumerate(closes):
+        day = pd.DataFrame({'Symbol': ['AAA'], 'Close': [close], 'Date': [pd.Timestamp('2025-01-01') + pd.Timedelta(days=i)]})
+        state = state.step(day)
+        # The state knows the history so far, like the reference run on it
+        assert_same_rsi(state.rsi(), [_reference_rsi(closes[:i + 1], period).iloc[-1]])
+
+
+@pytest.mark.parametrize('length', [0, 1, 14, 15])
+def test_short_history(length):
+    closes = pd.Series(100 + np.arange(length) % 3 - np.arange(length) % 2, dtype='float64')
+    rsi = wilder_rsi(closes, 14)
+    assert len(rsi) == length
+    assert_same_rsi(rsi, _reference_rsi(closes, 14))
+    # Fewer than period + 1 closes: no RSI at all
+    assert rsi.notna().any() == (length == 15)
+    if length == 15:
+        assert pd.notna(rsi.iloc[-1])
+
+
+def test_short_history_in_panel_and_state():
+    frame = pd.DataFrame({
+        'Symbol': pd.Categorical(['LONG'] * 20 + ['SHORT'] * 5, categories=['LONG', 'SHORT']),
+        'Close': np.r_[np.linspace(100, 120, 20), np.linspace(50, 55, 5)],
+        'Date': list(pd.date_range('2025-01-01', periods=20)) + list(pd.date_range('2025-01-16', periods=5)),
+    }).sort_values('Date', kind='mergesort').reset_index(drop=True)
+
+    latest = latest_rsi(frame, 14)
+    assert np.isnan(latest.at['SHORT', 'rsi'])
+    assert latest.at['SHORT', 'observations'] == 5
+    state = RsiState.from_frame(frame, 14).latest()
+    assert np.isnan(state.at['SHORT', 'rsi'])
+    assert_same_rsi(state['rsi'], latest['rsi'])
+
+
+def test_nan_closes_match_reference():
+    rng = np.random.default_rng(3)
+    closes = pd.Series(100 + rng.normal(0, 1, 60).cumsum())
+    closes[[5, 20, 21, 40]] = np.nan
+    for period in PERIODS:
+        assert_same_rsi(wilder_rsi(closes, period), _reference_rsi(closes, period))
+
+
+def test_nan_closes_in_panel_match_per_series():
+    rng = np.random.default_rng(7)
+    dates = pd.date_range('2025-01-01', periods=40)
+    frame = pd.DataFrame({
+        'Symbol': pd.Categorical(np.tile(['A', 'B'], 40), categories=['A', 'B']),
+        'Date': np.repeat(dates, 2),
+        'Close': 50 + rng.normal(0, 1, 80).cumsum(),
+    })
+    frame.loc[[10, 31, 55], 'Close'] = np.nan
+    codes = frame['Symbol'].cat.codes.to_numpy()
+    rsi, *_ = panel_rsi(codes, frame['Close'].to_numpy(), 2, 14)
+    for code in (0, 1):
+        rows = codes == code
+        assert_same_rsi(rsi[rows], _reference_rsi(frame.loc[rows, 'Close'].reset_index(drop=True), 14))
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from market_data import MarketSnapshot
+from signals import market_signals
+
+SETTINGS = {'top_turnover_count': 2, 'top_turnover_days': 1, 'sell_turnover_threshold': 2}
+
+
+def make_frame(closes):
+    """{symbol: closes} on the same business days, turnover falling in symbol order"""
+    symbols = list(closes)
+    n = len(next(iter(closes.values())))
+    dates = pd.bdate_range('2024-01-01', periods=n)
+    frame = pd.DataFrame({
+        'Symbol': np.tile(symbols, n),
+        'Date': np.repeat(dates, len(symbols)),
+        'Close': np.column_stack([closes[s] for s in symbols]).ravel(),
+        'Turnover': np.tile(np.arange(len(symbols), 0, -1) * 1e5, n),
+    })
+    frame['Symbol'] = pd.Categorical(frame['Symbol'], categories=symbols)
+    return frame
+
+
+def test_market_signals_skip_a_nan_latest_close():
+    up_down = 100 + np.arange(20) % 3 - np.arange(20) % 2
+    bad = up_down.astype('float64')
+    bad[-1] = np.nan  # e.g. an unparseable Close cell on the latest day
+    snapshot = MarketSnapshot(make_frame({'AAA': up_down, 'BBB': bad, 'CCC': up_down[::-1]}), None)
+
+    records = market_signals(snapshot, 14, SETTINGS)
+    assert [r['symbol'] for r in records] == ['AAA', 'CCC']
+    assert all(np.isfinite(r['close']) and np.isfinite(r['rsi']) for r in records)
+
+
+def test_market_signals_turnover_flags():
+    up_down = 100 + np.arange(20) % 3 - np.arange(20) % 2
+    snapshot = MarketSnapshot(make_frame({'AAA': up_down, 'BBB': up_down, 'CCC': up_down}), None)
+
+    records = {r['symbol']: r for r in market_signals(snapshot, 14, SETTINGS)}
+    assert [records[s]['turnover_rank'] for s in ('AAA', 'BBB', 'CCC')] == [1, 2, 3]
+    assert [records[s]['turnover_eligible'] for s in ('AAA', 'BBB', 'CCC')] == [True, True, False]
+    assert [records[s]['turnover_sell'] for s in ('AAA', 'BBB', 'CCC')] == [False, False, True]
+    assert records['AAA']['date'] == '2024-01-26'
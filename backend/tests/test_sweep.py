@@ -0,0 +1,55 @@
+import sys
+
+import pandas as pd
+import pytest
+
+import sweep
+from backtest import DEFAULT_SETTINGS, MarketArrays, load_sector_map, run_backtest
+from market_data import load_market_data
+
+
+def run_cli(monkeypatch, *args):
+    monkeypatch.setattr(sys, 'argv', ['sweep.py', *args])
+    sweep.main()
+
+
+def test_cli_without_flags_runs_default_settings(monkeypatch, prices_csv, sectors_csv, tmp_path):
+    output = tmp_path / 'results.csv'
+    run_cli(monkeypatch, prices_csv, '--sectors', sectors_csv, '--workers', '1', '--output', str(output))
+
+    results = pd.read_csv(output)
+    assert len(results) == 1
+    for key, value in DEFAULT_SETTINGS.items():
+        if key in sweep.SWEEP_KEYS:
+            assert results.at[0, key] == value
+
+
+def test_cli_grid_is_ranked_and_matches_single_backtests(monkeypatch, prices_csv, sectors_csv, tmp_path):
+    output = tmp_path / 'results.csv'
+    run_cli(monkeypatch, prices_csv, '--sectors', sectors_csv, '--workers', '2', '--output', str(output),
+            '--period', '9', '14', '--tsl', '3', '7.5')
+
+    results = pd.read_csv(output)
+    assert len(results) == 4
+    assert list(results['rank']) == [1, 2, 3, 4]
+    assert results['total_return_percent'].is_monotonic_decreasing
+
+    frame, _, _ = load_market_data(prices_csv)
+    market = MarketArrays.from_frame(frame)
+    sectors = load_sector_map(sectors_csv)
+    for row in results.itertuples():
+        expected = run_backtest(market, {'default_rsi_period': row.default_rsi_period,
+                                         'tsl_percentage': row.tsl_percentage}, sectors).summary()
+        assert row.total_return_percent == pytest.approx(expected['total_return_percent'])
+        assert row.cycles == expected['cycles']
+
+
+def test_cli_scaling_times_each_worker_count(monkeypatch, prices_csv, sectors_csv, tmp_path, capsys):
+    output = tmp_path / 'results.csv'
+    run_cli(monkeypatch, prices_csv, '--sectors', sectors_csv, '--output', str(output),
+            '--period', '9', '14', '--scaling', '1', '2')
+
+    lines = capsys.readouterr().out.splitlines()
+    assert any('1 workers' in line and 'speed-up 1.00x' in line for line in lines)
+    assert any('2 workers' in line for line in lines)
+    assert not output.exists()
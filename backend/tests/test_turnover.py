@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import FIXTURES_DIR
+from market_data import load_market_frame
+from turnover import TurnoverRanks, turnover_column
+
+
+@pytest.fixture(scope='module')
+def frame():
+    frame, _ = load_market_frame(os.path.join(FIXTURES_DIR, 'prices.csv'))
+    # A missing turnover ranks after every row that has one
+    frame.loc[frame.index[5], 'Turnover'] = np.nan
+    return frame
+
+
+def sorted_ranks(frame):
+    """{(symbol, date): rank} the way get_turnover_rank used to rank each day
+
+    Sorts each date's rows by turnover, highest first, and takes the row's
+    position in the sorted day (+1) as its rank.
+    """
+    expected = {}
+    for date in pd.unique(frame['Date']):
+        day = frame[frame['Date'] == date]
+        day = day.sort_values('Turnover', ascending=False, kind='stable').reset_index(drop=True)
+        for position, symbol in enumerate(day['Symbol']):
+            expected[(str(symbol), date)] = position + 1
+    return expected
+
+
+def assert_ranks_match(table, expected, symbols, dates):
+    for symbol in symbols:
+        for date in dates:
+            assert table.rank(symbol, date) == expected.get((symbol, date)), (symbol, date)
+
+
+def test_rank_matches_sorting_each_day(frame):
+    table = TurnoverRanks(frame)
+    expected = sorted_ranks(frame)
+    assert_ranks_match(table, expected, table.symbols, table.dates)
+    assert table.rank('NOPE', table.dates[0]) is None
+    assert table.rank(table.symbols[0], '1999-01-01') is None
+
+
+def test_ranks_at_and_top_n_mask_match_scalar_lookups(frame):
+    table = TurnoverRanks(frame)
+    symbols = frame['Symbol'].astype(str).to_numpy()
+    dates = frame['Date'].to_numpy()
+    ranks = table.ranks_at(symbols, dates)
+    assert [int(r) for r in ranks] == [table.rank(s, d) for s, d in zip(symbols, dates)]
+    for top_n, days in [(3, 1), (3, 2), (5, 3)]:
+        mask = table.top_n_mask(symbols, dates, top_n, days)
+        assert mask.tolist() == [table.in_top_n(s, d, top_n, days) for s, d in zip(symbols, dates)]
+
+
+def test_in_top_n_needs_every_day_of_the_window(frame):
+    table = TurnoverRanks(frame)
+    symbol, d = table.symbols[0], 10
+    window = [table.rank(symbol, date) for date in table.dates[d - 2:d + 1]]
+    top_n = max(window)
+    assert table.in_top_n(symbol, table.dates[d], top_n, days=3)
+    assert not table.in_top_n(symbol, table.dates[d], min(window) - 1, days=3)
+    # Not enough history for the window
+    assert not table.in_top_n(symbol, table.dates[1], len(table.symbols), days=3)
+
+
+def test_append_day_matches_full_rebuild(frame):
+    last = frame['Date'].max()
+    table = TurnoverRanks(frame[frame['Date'] < last])
+    day = frame[frame['Date'] == last].copy()
+    # A symbol listed on the appended day gets a new column
+    new = day.iloc[:1].copy()
+    new['Symbol'] = 'NEWCO'
+    new['Turnover'] = day['Turnover'].max() + 1
+    day = pd.concat([day.astype({'Symbol': str}), new], ignore_index=True)
+
+    appended = table.append_day(day)
+    assert list(appended.dates) == list(table.dates) + [last]
+    assert appended.symbols == table.symbols + ['NEWCO']
+    assert appended.rank('NEWCO', last) == 1
+
+    full = pd.concat([frame[frame['Date'] < last].astype({'Symbol': str}), day], ignore_index=True)
+    assert_ranks_match(appended, sorted_ranks(full), appended.symbols, appended.dates)
+    # The original table is left as it was
+    assert len(table.dates) == len(appended.dates) - 1
+
+
+def test_turnover_column_falls_back_to_volume_times_close():
+    frame = pd.DataFrame({'Close': [10.0, 20.0], 'Vol': [3.0, 4.0]})
+    assert turnover_column(frame).tolist() == [30.0, 80.0]
@@ -0,0 +1,111 @@
+"""
+Daily turnover ranks - a (date x symbol) rank matrix built once per data load,
+so "rank of symbol on date" and "in top N for the last K trading days" are
+array lookups instead of a filter + sort of the day's rows on every call.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def turnover_column(frame):
+    """Turnover per row (falls back to volume * close when the column is missing)"""
+    if 'Turnover' in frame.columns:
+        return frame['Turnover']
+    volume = frame['Vol'] if 'Vol' in frame.columns else frame['Volume']
+    return volume * frame['Close']
+
+
+class TurnoverRanks:
+    """Turnover rank of every symbol on every trading day (1 = highest)
+
+    Ties keep file order (rank method 'first'); rows with a missing turnover
+    rank after every row that has one, like the old sort_values ranking.
+    Symbols that did not trade on a date have no rank.
+    """
+
+    def __init__(self, frame):
+        ranks = turnover_column(frame).groupby(frame['Date']).rank(
+            method='first', ascending=False, na_option='bottom'
+        )
+        date_codes, dates = pd.factorize(frame['Date'], sort=True)
+        symbol_codes = frame['Symbol'].cat.codes.to_numpy()
+        symbols = frame['Symbol'].cat.categories
+
+        matrix = np.full((len(dates), len(symbols)), np.nan)
+        matrix[date_codes, symbol_codes] = ranks.to_numpy()
+        self._set(pd.DatetimeIndex(dates), list(symbols), matrix)
+
+    @classmethod
+    def _from_parts(cls, dates, symbols, matrix):
+        ranks = cls.__new__(cls)
+        ranks._set(dates, symbols, matrix)
+        return ranks
+
+    def _set(self, dates, symbols, matrix):
+        self.dates = dates
+        self.symbols = symbols
+        self.matrix = matrix
+        self._date_pos = {date: i for i, date in enumerate(self.dates)}
+        self._symbol_pos = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    def append_day(self, day):
+        """Rank table with one more trading day (rows of a single date after the last one)
+
+        Returns a new table; new symbols get columns after the existing ones in
+        the order they appear in day. Copying the matrix is a single memcpy -
+        no re-ranking of earlier days.
+        """
+        date = pd.Timestamp(day['Date'].iloc[0])
+        day_symbols = day['Symbol'].astype(str).to_numpy()
+        symbols = self.symbols + [s for s in day_symbols if s not in self._symbol_pos]
+
+        matrix = np.full((len(self.dates) + 1, len(symbols)), np.nan)
+        matrix[:-1, :len(self.symbols)] = self.matrix
+        ranks = turnover_column(day).rank(method='first', ascending=False, na_option='bottom')
+        matrix[-1, pd.Index(symbols).get_indexer(day_symbols)] = ranks.to_numpy()
+
+        return TurnoverRanks._from_parts(self.dates.append(pd.DatetimeIndex([date])), symbols, matrix)
+
+    def _position(self, symbol, date):
+        return self._date_pos.get(pd.Timestamp(date)), self._symbol_pos.get(symbol)
+
+    def rank(self, symbol, date):
+        """Turnover rank of symbol on date, or None if it did not trade that day"""
+        d, s = self._position(symbol, date)
+        if d is None or s is None:
+            return None
+        value = self.matrix[d, s]
+        return None if np.isnan(value) else int(value)
+
+    def in_top_n(self, symbol, date, top_n, days=1):
+        """True if symbol ranked within top_n on date and on the days - 1 trading days before it"""
+        d, s = self._position(symbol, date)
+        if d is None or s is None or d < days - 1:
+            return False
+        window = self.matrix[d - days + 1:d + 1, s]
+        # NaN (did not trade) compares False, so a missing day fails the check
+        return bool(np.all(window <= top_n))
+
+    def _positions(self, symbols, dates):
+        d = self.dates.get_indexer(pd.DatetimeIndex(dates))
+        s = pd.Index(self.symbols).get_indexer(symbols)
+        return d, s
+
+    def ranks_at(self, symbols, dates):
+        """Vectorized rank() over aligned symbol/date arrays (NaN where there is no rank)"""
+        d, s = self._positions(symbols, dates)
+        found = (d >= 0) & (s >= 0)
+        result = np.full(len(d), np.nan)
+        result[found] = self.matrix[d[found], s[found]]
+        return result
+
+    def top_n_mask(self, symbols, dates, top_n, days=1):
+        """Vectorized in_top_n() over aligned symbol/date arrays"""
+        d, s = self._positions(symbols, dates)
+        mask = (d >= 0) & (s >= 0) & (d >= days - 1)
+        for k in range(days):
+            if not mask.any():
+                break
+            mask[mask] = self.matrix[d[mask] - k, s[mask]] <= top_n
+        return mask
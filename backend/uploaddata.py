@@ -33,3 +33,199 @@
 # conn.close()
 
 # print("✅ CSV uploaded successfully")
+
+
+"""
+Data upload tool - bulk loads CSV data into PostgreSQL
+
+    python uploaddata.py prices [path/to/data.csv]
+    python uploaddata.py sectors [path/to/Sectors&Symbols.csv]
+
+Rows are streamed with COPY FROM STDIN into a temporary staging table and
+merged with a single INSERT ... ON CONFLICT, so a load is a handful of round
+trips whatever the file size, and re-running it is safe.
+"""
+
+import argparse
+import io
+import os
+import time
+
+import pandas as pd
+import psycopg2
+
+from create_databse import DB_CONFIG, DB_NAME, create_price_partitions
+from market_data import load_market_frame
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+PRICE_COLUMNS = ['symbol', 'date', 'open', 'high', 'low', 'close', 'percent_change', 'volume', 'turnover']
+
+
+def copy_frame(cursor, frame, table):
+    """Stream the columns of frame into table with COPY FROM STDIN (NaN -> NULL)"""
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False, date_format='%Y-%m-%d', na_rep='')
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(frame.columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def upsert_counts(cursor, upsert_sql):
+    """Run an INSERT ... ON CONFLICT ... RETURNING (xmax = 0) AS inserted and count the outcome
+
+    xmax is 0 only for freshly inserted rows, so updated rows are the rest.
+    """
+    cursor.execute(f'''
+        WITH upserted AS ({upsert_sql})
+        SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted) FROM upserted
+    ''')
+    return cursor.fetchone()
+
+
+def price_rows(frame):
+    """daily_prices rows from a cleaned market data frame (last row wins per symbol and date)"""
+    def column(name):
+        return frame[name] if name in frame.columns else pd.Series(float('nan'), index=frame.index)
+
+    prices = pd.DataFrame({
+        'symbol': frame['Symbol'].astype(str),
+        'date': frame['Date'],
+        'open': column('Open'),
+        'high': column('High'),
+        'low': column('Low'),
+        'close': column('Close'),
+        'percent_change': pd.to_numeric(column('Percent Change'), errors='coerce'),
+        'volume': column('Vol'),
+        'turnover': column('Turnover'),
+    }, columns=PRICE_COLUMNS)
+    # One statement cannot upsert the same key twice
+    return prices.drop_duplicates(['symbol', 'date'], keep='last')
+
+
+def upload_prices(path):
+    """Load the market data CSV into daily_prices"""
+    start = time.perf_counter()
+    frame, report = load_market_frame(path)
+    for col, info in report.items():
+        print(f"⚠️  {col}: {info['invalid']} unparseable cells loaded as NULL")
+    prices = price_rows(frame)
+    print(f"📄 Parsed {len(prices)} price rows from {path}")
+
+    conn = psycopg2.connect(**DB_CONFIG, database=DB_NAME)
+    try:
+        with conn.cursor() as cursor:
+            create_price_partitions(cursor, prices['date'].dt.year.unique())
+            cursor.execute('''
+                CREATE TEMP TABLE daily_prices_staging
+                (LIKE daily_prices INCLUDING DEFAULTS) ON COMMIT DROP
+            ''')
+            copy_frame(cursor, prices, 'daily_prices_staging')
+            inserted, updated = upsert_counts(cursor, '''
+                INSERT INTO daily_prices AS p (symbol, date, open, high, low, close, percent_change, volume, turnover)
+                SELECT symbol, date, open, high, low, close, percent_change, volume, turnover
+                FROM daily_prices_staging
+                ON CONFLICT (symbol, date) DO UPDATE SET
+                    open = EXCLUDED.open,
+                    high = EXCLUDED.high,
+                    low = EXCLUDED.low,
+                    close = EXCLUDED.close,
+                    percent_change = EXCLUDED.percent_change,
+                    volume = EXCLUDED.volume,
+                    turnover = EXCLUDED.turnover,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE (p.open, p.high, p.low, p.close, p.percent_change, p.volume, p.turnover)
+                    IS DISTINCT FROM
+                    (EXCLUDED.open, EXCLUDED.high, EXCLUDED.low, EXCLUDED.close,
+                     EXCLUDED.percent_change, EXCLUDED.volume, EXCLUDED.turnover)
+                RETURNING (xmax = 0) AS inserted
+            ''')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    unchanged = len(prices) - inserted - updated
+    print(f"✅ daily_prices: {inserted} inserted, {updated} updated, {unchanged} unchanged "
+          f"in {time.perf_counter() - start:.2f}s")
+    return {'inserted': inserted, 'updated': updated, 'unchanged': unchanged}
+
+
+def sector_rows(path):
+    """sectors rows from Sectors&Symbols.csv (last row wins per symbol)
+
+    created_at values look like "Saturday, 8 February 2025"; unparseable ones
+    become NULL and get the current time on insert.
+    """
+    raw = pd.read_csv(path, dtype=str)
+    sectors = pd.DataFrame({
+        'sector_name': raw['Sector_name'].str.strip(),
+        'symbol': raw['Symbol'].str.strip(),
+        'max_positions': pd.to_numeric(raw['max_positions'], errors='coerce').fillna(3).astype(int),
+        'created_at': pd.to_datetime(raw['created_at'].str.strip(), format='%A, %d %B %Y', errors='coerce'),
+    })
+    sectors = sectors[sectors['symbol'].notna() & (sectors['symbol'] != '') & sectors['sector_name'].notna()]
+    return sectors.drop_duplicates('symbol', keep='last')
+
+
+def upload_sectors(path):
+    """Sync the sectors table with the sector CSV"""
+    start = time.perf_counter()
+    sectors = sector_rows(path)
+    print(f"📄 Parsed {len(sectors)} sector rows from {path}")
+
+    conn = psycopg2.connect(**DB_CONFIG, database=DB_NAME)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute('''
+                CREATE TEMP TABLE sectors_staging (
+                    sector_name VARCHAR(100),
+                    symbol VARCHAR(20),
+                    max_positions INTEGER,
+                    created_at TIMESTAMP
+                ) ON COMMIT DROP
+            ''')
+            copy_frame(cursor, sectors, 'sectors_staging')
+            inserted, updated = upsert_counts(cursor, '''
+                INSERT INTO sectors AS s (sector_name, symbol, max_positions, created_at)
+                SELECT sector_name, symbol, max_positions, COALESCE(created_at, CURRENT_TIMESTAMP)
+                FROM sectors_staging
+                ON CONFLICT (symbol) DO UPDATE SET
+                    sector_name = EXCLUDED.sector_name,
+                    max_positions = EXCLUDED.max_positions
+                WHERE (s.sector_name, s.max_positions) IS DISTINCT FROM (EXCLUDED.sector_name, EXCLUDED.max_positions)
+                RETURNING (xmax = 0) AS inserted
+            ''')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    unchanged = len(sectors) - inserted - updated
+    print(f"✅ sectors: {inserted} inserted, {updated} updated, {unchanged} unchanged "
+          f"in {time.perf_counter() - start:.2f}s")
+    return {'inserted': inserted, 'updated': updated, 'unchanged': unchanged}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk load CSV data into PostgreSQL')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    prices = commands.add_parser('prices', help='Load the OHLCV data CSV into daily_prices')
+    prices.add_argument('path', nargs='?', default=os.path.join(DATA_DIR, 'data_sample.csv'))
+
+    sectors = commands.add_parser('sectors', help='Sync the sectors table with Sectors&Symbols.csv')
+    sectors.add_argument('path', nargs='?', default=os.path.join(DATA_DIR, 'Sectors&Symbols.csv'))
+
+    args = parser.parse_args()
+    if args.command == 'prices':
+        upload_prices(args.path)
+    elif args.command == 'sectors':
+        upload_sectors(args.path)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,2 +1,8 @@
-from app import app
+"""
+WSGI entry point of the web process: gunicorn wsgi:app
+
+The end-of-day pipeline is not started here - every gunicorn worker would run
+its own copy. Run scheduler.py as one separate process next to it (see README).
+"""
 
+from app import app